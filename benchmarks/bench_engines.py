@@ -0,0 +1,59 @@
+"""
+Compares the 'overlay' and 'strtree' intersection engines, with and without the containment fast
+path, on synthetic data.
+
+Every option must return the same intersecting pairs and areas; the script fails if they do not.
+
+Usage, with the package installed (pip install -e .):
+    python benchmarks/bench_engines.py 1000 10000 100000
+"""
+
+# Import libraries
+import sys
+import time
+
+import numpy as np
+
+from synthetic import make_data
+from spatial_summarize_within.crosswalk import project_equal_area
+from spatial_summarize_within.intersection import intersect_pairs
+
+
+# Intersection options to compare
+OPTIONS = {
+    'overlay': {'engine': 'overlay'},
+    'strtree': {'engine': 'strtree'},
+    'containment': {'engine': 'strtree', 'containment': True},
+}
+
+
+# Function
+def run(n_sources):
+    targets, sources = make_data(n_sources)
+    sources, targets = project_equal_area(sources, targets)
+
+    results = {}
+    for name, options in OPTIONS.items():
+        stats = {}
+        start = time.perf_counter()
+        source_idx, target_idx, area = intersect_pairs(
+            sources.geometry.values, targets.geometry.values, stats=stats, **options)
+        elapsed = time.perf_counter() - start
+
+        # Sort the pairs so every option can be compared
+        order = np.lexsort((target_idx, source_idx))
+        results[name] = (source_idx[order], target_idx[order], area[order])
+        print(f"{len(sources):>9} sources  {len(order):>9} pairs  {name:<12} {elapsed:8.3f}s  "
+              f"nested={stats.get('nested_sources', 0)} boundary={stats['boundary_sources']}")
+
+    # Check every option is equivalent to the overlay
+    overlay = results['overlay']
+    for name, result in results.items():
+        np.testing.assert_array_equal(overlay[0], result[0], err_msg=name)
+        np.testing.assert_array_equal(overlay[1], result[1], err_msg=name)
+        np.testing.assert_allclose(overlay[2], result[2], rtol=1e-9, atol=1e-6, err_msg=name)
+
+
+if __name__ == '__main__':
+    for n_sources in [int(n) for n in sys.argv[1:]] or [1_000, 10_000, 100_000]:
+        run(n_sources)
@@ -0,0 +1,92 @@
+"""
+Measures the peak memory of sum_within on a wide input, where the summary features carry many more
+columns than are summarized, against the original implementation that overlaid the full frames.
+
+Peak memory is measured with tracemalloc, which tracks Python and NumPy allocations but not memory
+allocated inside GEOS. Every option must return the same sums; the script fails if they do not.
+
+Usage, with the package installed (pip install -e .):
+    python benchmarks/bench_memory.py 10000 --columns 300 --summarized 50
+"""
+
+# Import libraries
+import argparse
+import time
+import tracemalloc
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+
+from synthetic import make_data
+from spatial_summarize_within import sum_within
+
+
+# Function
+def overlay_sum_within(input_shapefile, input_summary_features, columns, key, join_type='inner'):
+    # The original sum_within, which overlays the full frames and adds weighted columns to the result
+    if key in input_shapefile.columns and key in input_summary_features.columns:
+        input_summary_features = input_summary_features.rename(columns={key: key + "_summary"})
+    if input_summary_features.crs != input_shapefile.crs:
+        input_summary_features = input_summary_features.to_crs(input_shapefile.crs)
+    input_summary_features = input_summary_features.to_crs('EPSG:6933')
+    input_shapefile = input_shapefile.to_crs('EPSG:6933')
+    input_summary_features["area"] = input_summary_features.geometry.area
+    intersected = gpd.overlay(input_summary_features, input_shapefile, how='intersection', keep_geom_type=False)
+    intersected["intersect_area"] = intersected.area
+    intersected["overlap_pct"] = intersected["intersect_area"] / intersected["area"]
+    for column in columns:
+        intersected[f"{column}_weighted"] = intersected[column] * intersected["overlap_pct"]
+    grouped_result = intersected.groupby(key)[[f"{column}_weighted" for column in columns]].sum().reset_index()
+    grouped_result = grouped_result.rename(columns={f"{column}_weighted": column for column in columns})
+    result_gdf = input_shapefile.merge(grouped_result, on=key, how=join_type)
+    result_gdf[columns] = result_gdf[columns].round(2)
+    return result_gdf
+
+
+# Options to compare, by name
+OPTIONS = {
+    'original overlay': (overlay_sum_within, {}),
+    'overlay': (sum_within, {'engine': 'overlay'}),
+    'strtree': (sum_within, {'engine': 'strtree', 'containment': True}),
+    'strtree float32': (sum_within, {'engine': 'strtree', 'containment': True, 'dtype': np.float32}),
+}
+
+
+# Function
+def run(n_sources, n_columns, n_summarized):
+    targets, sources = make_data(n_sources, n_columns=n_columns)
+    # Add unrelated text attributes, like candidate names, that are never summarized
+    for position in range(n_columns // 10):
+        sources[f"label_{position}"] = sources["SOURCE_ID"].astype(str) + f"_{position}"
+    columns = [f"value_{position}" for position in range(n_summarized)]
+
+    results = {}
+    for name, (function, options) in OPTIONS.items():
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = function(targets, sources, columns, 'DISTRICT', **options)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results[name] = (result, peak)
+        baseline = results['original overlay'][1]
+        print(f"{len(sources):>9} sources  {sources.shape[1]:>4} columns  {len(columns):>4} summarized  "
+              f"{name:<16} {elapsed:8.3f}s  peak {peak / 2 ** 20:9.1f} MiB  x{peak / baseline:.2f}")
+
+    # Check every option returns the same sums as the original
+    expected = pd.DataFrame(results['original overlay'][0][['DISTRICT'] + columns])
+    for name, (result, _) in results.items():
+        pd.testing.assert_frame_equal(expected, pd.DataFrame(result[['DISTRICT'] + columns]),
+                                      check_dtype=False, rtol=1e-6, atol=0.011, obj=name)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('sizes', type=int, nargs='*', default=[10_000])
+    parser.add_argument('--columns', type=int, default=300, help="number of numeric columns of the summary features")
+    parser.add_argument('--summarized', type=int, default=50, help="number of columns to summarize")
+    args = parser.parse_args()
+
+    for n_sources in args.sizes:
+        run(n_sources, args.columns, args.summarized)
@@ -0,0 +1,115 @@
+"""
+Benchmark suite timing every statistic and intersection option on synthetic nested polygon grids.
+
+Each run profiles sum_within, mean_within, min_within and max_within stage by stage and writes the
+results as JSON, so runs on different commits or machines can be compared. The data is generated
+from a fixed seed, so the same sizes always produce the same features.
+
+Usage, with the package installed (pip install -e .):
+    python benchmarks/run.py --sizes 1000 10000 100000 --output results.json
+    python benchmarks/run.py --sizes 1000000 --options strtree containment --output large.json
+    python benchmarks/run.py --output new.json --compare results.json
+"""
+
+# Import libraries
+import argparse
+import json
+import platform
+import sys
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+from synthetic import make_data
+import spatial_summarize_within
+from spatial_summarize_within import Profiler
+
+# Intersection options to benchmark
+OPTIONS = {
+    'overlay': {'engine': 'overlay'},
+    'strtree': {'engine': 'strtree'},
+    'containment': {'engine': 'strtree', 'containment': True},
+    'parallel': {'engine': 'strtree', 'containment': True, 'n_jobs': -1},
+}
+
+# Statistics to benchmark
+FUNCTIONS = {
+    'sum': spatial_summarize_within.sum_within,
+    'mean': spatial_summarize_within.mean_within,
+    'min': spatial_summarize_within.min_within,
+    'max': spatial_summarize_within.max_within,
+}
+
+
+# Function
+def metadata(args):
+    # Versions and settings needed to tell whether two runs are comparable
+    return {
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'geopandas': gpd.__version__,
+        'shapely': shapely.__version__,
+        'geos': shapely.geos_version_string,
+        'seed': args.seed,
+        'memory': args.memory,
+    }
+
+
+# Function
+def run(args):
+    results = []
+    for n_sources in args.sizes:
+        targets, sources = make_data(n_sources, seed=args.seed)
+        columns = [column for column in sources.columns if column.startswith('value_')]
+        for stat in args.stats:
+            for name in args.options:
+                profiler = Profiler(memory=args.memory)
+                FUNCTIONS[stat](targets, sources, columns, 'DISTRICT', profiler=profiler, **OPTIONS[name])
+                results.append({
+                    'n_sources': len(sources),
+                    'n_targets': len(targets),
+                    'stat': stat,
+                    'option': name,
+                    'seconds': profiler.seconds,
+                    'stages': profiler.stages,
+                })
+                print(f"{len(sources):>9} sources  {stat:<5} {name:<12} {profiler.seconds:8.3f}s  "
+                      + "  ".join(f"{stage['stage']}={stage['seconds']:.3f}" for stage in profiler.stages))
+    return results
+
+
+# Function
+def compare(results, baseline):
+    # Print the ratio of every run's wall time to the same run in the baseline
+    previous = {(run['n_sources'], run['stat'], run['option']): run['seconds'] for run in baseline['results']}
+    for run in results:
+        seconds = previous.get((run['n_sources'], run['stat'], run['option']))
+        if seconds:
+            print(f"{run['n_sources']:>9} sources  {run['stat']:<5} {run['option']:<12} "
+                  f"{seconds:8.3f}s -> {run['seconds']:8.3f}s  x{run['seconds'] / seconds:.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000],
+                        help="numbers of summary features to generate, up to 1000000")
+    parser.add_argument('--stats', nargs='+', default=list(FUNCTIONS), choices=list(FUNCTIONS))
+    parser.add_argument('--options', nargs='+', default=list(OPTIONS), choices=list(OPTIONS))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--memory', action='store_true', help="measure the peak memory of every stage")
+    parser.add_argument('--output', help="path of the JSON file to write the results to")
+    parser.add_argument('--compare', help="path of a previous JSON results file to compare against")
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'metadata': metadata(args), 'results': results}, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
@@ -0,0 +1,79 @@
+# Import libraries
+import numpy as np
+import geopandas as gpd
+import shapely
+
+
+# Function
+def make_data(n_sources, sources_per_target=100, straddle_frac=0.05, n_columns=3, seed=0):
+    """
+    This function generates a synthetic target grid and summary features nested inside it.
+
+    Targets are quadrilaterals of a jittered lattice that tile the extent. Each target is split into
+    sub-quadrilaterals that are nested inside it, and a fraction of summary features are replaced by
+    boxes centered on a target edge so that they straddle two targets.
+
+    Parameters:
+    - n_sources (int): Approximate number of summary features to generate.
+    - sources_per_target (int): Approximate number of summary features nested in each target.
+    - straddle_frac (float): Fraction of summary features that straddle a target boundary.
+    - n_columns (int): Number of value columns to add to the summary features.
+    - seed (int): Seed of the random generator.
+
+    Returns:
+    - tuple: The (targets, sources) GeoDataFrames in EPSG:4326.
+    """
+
+    rng = np.random.default_rng(seed)
+    k = max(int(round(np.sqrt(sources_per_target))), 1)
+    g = max(int(np.ceil(np.sqrt(n_sources / k ** 2))), 1)
+    cell = 10.0 / g
+
+    # Jitter the interior points of a lattice over a 10 x 10 degree extent
+    axis = np.linspace(0.0, 10.0, g + 1)
+    lattice = np.stack(np.meshgrid(axis, axis, indexing='ij'), axis=-1)
+    lattice[1:-1, 1:-1] += rng.uniform(-0.3, 0.3, size=(g - 1, g - 1, 2)) * cell if g > 1 else 0.0
+    lattice += [-100.0, 30.0]
+
+    # Corners of every target quadrilateral
+    c00 = lattice[:-1, :-1].reshape(-1, 2)
+    c10 = lattice[1:, :-1].reshape(-1, 2)
+    c11 = lattice[1:, 1:].reshape(-1, 2)
+    c01 = lattice[:-1, 1:].reshape(-1, 2)
+    targets = gpd.GeoDataFrame(
+        {
+            "DISTRICT": [f"D{i:05d}" for i in range(len(c00))],
+            "NAME": [f"District {i}" for i in range(len(c00))],
+        },
+        geometry=shapely.polygons(np.stack([c00, c10, c11, c01, c00], axis=1)),
+        crs="EPSG:4326",
+    )
+
+    # Split every target into k x k sub-quadrilaterals by bilinear interpolation of its corners
+    steps = np.arange(k + 1) / k
+    u, v = np.meshgrid(steps, steps, indexing='ij')
+    u, v = u[..., None], v[..., None]
+    points = ((1 - u) * (1 - v) * c00[:, None, None] + u * (1 - v) * c10[:, None, None]
+              + u * v * c11[:, None, None] + (1 - u) * v * c01[:, None, None])
+    rings = np.stack([points[:, :-1, :-1], points[:, 1:, :-1], points[:, 1:, 1:],
+                      points[:, :-1, 1:], points[:, :-1, :-1]], axis=-2).reshape(-1, 5, 2)
+    geoms = shapely.polygons(rings)
+
+    # Replace a fraction of the summary features with boxes centered on a target edge
+    n_straddle = int(round(len(geoms) * straddle_frac))
+    replaced = rng.choice(len(geoms), size=n_straddle, replace=False)
+    edge = rng.integers(len(c00), size=n_straddle)
+    centers = (c10[edge] + c11[edge]) / 2
+    half = cell / k / 2
+    geoms[replaced] = shapely.box(centers[:, 0] - half, centers[:, 1] - half,
+                                  centers[:, 0] + half, centers[:, 1] + half)
+
+    # Add value columns
+    columns = {f"value_{i}": rng.integers(0, 1000, size=len(geoms)) for i in range(n_columns)}
+    sources = gpd.GeoDataFrame(
+        {"SOURCE_ID": np.arange(len(geoms)), **columns},
+        geometry=geoms,
+        crs="EPSG:4326",
+    )
+
+    return targets, sources
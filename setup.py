@@ -9,5 +9,10 @@ setup(
     install_requires=[
         "geopandas",
         "pandas",
+        "scipy",
     ],
+    extras_require={
+        "stream": ["pyarrow", "pyogrio"],
+        "test": ["pytest"],
+    },
 )
\ No newline at end of file
@@ -1,4 +1,10 @@
 from .sum_within import sum_within
 from .mean_within import mean_within
 from .max_within import max_within
-from .min_within import min_within
\ No newline at end of file
+from .min_within import min_within
+from .crosswalk import Crosswalk, PreparedTarget, build_crosswalk
+from .stream_within import stream_within
+from .summarize_many import summarize_many
+from .cache import GeometryCache
+from .incremental import IncrementalSummary
+from .profiling import Profiler
@@ -0,0 +1,148 @@
+# Import libraries
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import shapely
+
+from .crosswalk import ProjectedGeometry, project_geometry
+
+
+# Function
+def _crs_text(crs):
+    return crs.to_wkt() if crs is not None else ""
+
+
+# Function
+def fingerprint(geometry, via_crs=None):
+    """
+    This function computes a fingerprint of a GeoSeries from the WKB of its geometries and its CRS.
+
+    Parameters:
+    - geometry (GeoSeries): The geometries to fingerprint.
+    - via_crs (CRS): CRS the geometries are converted through before the equal area projection.
+
+    Returns:
+    - str: Hex digest identifying the geometries and how they are reprojected.
+    """
+
+    wkb = shapely.to_wkb(np.asarray(geometry.values))
+    lengths = np.array([len(buffer) if buffer is not None else -1 for buffer in wkb], dtype=np.int64)
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(lengths.tobytes())
+    digest.update(b"".join(buffer for buffer in wkb if buffer is not None))
+    digest.update(_crs_text(geometry.crs).encode())
+    digest.update(_crs_text(via_crs).encode())
+    return digest.hexdigest()
+
+
+class GeometryCache:
+    """
+    Cache of reprojected geometries, their areas and spatial indexes, keyed by geometry fingerprint.
+
+    Entries are kept in memory up to maxsize, evicting the least recently used. With a directory, the
+    reprojected geometries and areas are also written to disk as .npy files and memory-mapped when
+    reloaded, so they survive across processes.
+
+    Attributes:
+    - maxsize (int): Maximum number of entries kept in memory.
+    - directory (str): Optional directory of the on-disk cache.
+    - hits (int): Number of lookups served from memory.
+    - disk_hits (int): Number of lookups served from disk.
+    - misses (int): Number of lookups that reprojected the geometries.
+    """
+
+    def __init__(self, maxsize=32, directory=None):
+        self.maxsize = maxsize
+        self.directory = directory
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return (f"GeometryCache(entries={len(self)}, maxsize={self.maxsize}, hits={self.hits}, "
+                f"disk_hits={self.disk_hits}, misses={self.misses})")
+
+    def clear(self):
+        """Removes every entry from memory and resets the counters, leaving the on-disk cache in place."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.disk_hits = self.misses = 0
+
+    def project(self, geometry, via_crs=None):
+        """
+        Returns geometries in the equal area projection, reprojecting them only on a cache miss.
+
+        Geometries are first converted to via_crs, like summary features are converted to the CRS of
+        the shapefile, and reprojection is skipped when they are already in the target CRS.
+
+        Parameters:
+        - geometry (GeoSeries): The geometries to reproject.
+        - via_crs (CRS): Optional CRS to convert the geometries to before the equal area projection.
+
+        Returns:
+        - ProjectedGeometry: The reprojected geometries, their areas and spatial index.
+        """
+
+        key = fingerprint(geometry, via_crs)
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        entry = self._load(key)
+        if entry is None:
+            entry = project_geometry(geometry, via_crs)
+            self._save(key, entry)
+            counter = 'misses'
+        else:
+            counter = 'disk_hits'
+
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def _load(self, key):
+        # Memory-map an entry from the on-disk cache
+        path = self.directory and os.path.join(self.directory, key)
+        if not path or not os.path.isdir(path):
+            return None
+        wkb = np.load(os.path.join(path, "wkb.npy"), mmap_mode='r')
+        offsets = np.load(os.path.join(path, "offsets.npy"))
+        buffers = np.array([wkb[start:stop].tobytes() if stop > start else None
+                            for start, stop in zip(offsets[:-1], offsets[1:])], dtype=object)
+        return ProjectedGeometry(shapely.from_wkb(buffers), np.load(os.path.join(path, "area.npy"), mmap_mode='r'))
+
+    def _save(self, key, entry):
+        # Write an entry to the on-disk cache, atomically so concurrent readers never see it half written
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, key)
+        wkb = shapely.to_wkb(entry.geoms)
+        lengths = np.array([len(buffer) if buffer is not None else 0 for buffer in wkb], dtype=np.int64)
+        staging = tempfile.mkdtemp(dir=self.directory)
+        np.save(os.path.join(staging, "wkb.npy"),
+                np.frombuffer(b"".join(buffer for buffer in wkb if buffer is not None), dtype=np.uint8))
+        np.save(os.path.join(staging, "offsets.npy"), np.r_[0, np.cumsum(lengths)])
+        np.save(os.path.join(staging, "area.npy"), entry.area)
+        try:
+            os.replace(staging, path)
+        except OSError:
+            # Another process wrote the same entry first
+            for name in os.listdir(staging):
+                os.remove(os.path.join(staging, name))
+            os.rmdir(staging)
@@ -0,0 +1,615 @@
+# Import libraries
+import hashlib
+import weakref
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+from pyproj import Transformer
+from scipy import sparse
+
+from .intersection import intersect_pairs
+from .parallel import parallel_pairs
+from .profiling import stage
+
+# Equal area projection used to measure overlaps
+EQUAL_AREA_CRS = 'EPSG:6933'
+
+# Statistics a crosswalk can calculate
+STATS = ('sum', 'mean', 'min', 'max')
+
+
+# Function
+def project_equal_area(input_summary_features, input_shapefile):
+    """
+    This function reprojects the summary features and the shapefile to the equal area projection
+    used to measure overlapping areas.
+
+    Parameters:
+    - input_summary_features (GeoDataFrame): The summary features with values to summarize.
+    - input_shapefile (GeoDataFrame): The shapefile to summarize within.
+
+    Returns:
+    - tuple: The reprojected (input_summary_features, input_shapefile).
+    """
+
+    # Set same CRS
+    if input_summary_features.crs != input_shapefile.crs:
+        input_summary_features = input_summary_features.to_crs(input_shapefile.crs)
+
+    # Set equal area projection
+    if input_summary_features.crs != EQUAL_AREA_CRS:
+        input_summary_features = input_summary_features.to_crs(EQUAL_AREA_CRS)
+    if input_shapefile.crs != EQUAL_AREA_CRS:
+        input_shapefile = input_shapefile.to_crs(EQUAL_AREA_CRS)
+
+    return input_summary_features, input_shapefile
+
+
+# Function
+def project_geometry(geometry, via_crs=None):
+    """
+    This function reprojects geometries to the equal area projection, skipping conversions to the CRS
+    they are already in.
+
+    Parameters:
+    - geometry (GeoSeries): The geometries to reproject.
+    - via_crs (CRS): Optional CRS to convert the geometries to before the equal area projection.
+
+    Returns:
+    - ProjectedGeometry: The reprojected geometries and their areas.
+    """
+
+    # Set same CRS
+    if via_crs is not None and geometry.crs != via_crs:
+        geometry = geometry.to_crs(via_crs)
+
+    # Set equal area projection
+    if geometry.crs != EQUAL_AREA_CRS:
+        geometry = geometry.to_crs(EQUAL_AREA_CRS)
+
+    geoms = np.asarray(geometry.values)
+    return ProjectedGeometry(geoms, shapely.area(geoms))
+
+
+# Function
+def source_fingerprint(geometry):
+    """
+    This function computes a fingerprint of the order and extent of summary features from their bounds,
+    cheap enough to check every time a crosswalk is applied.
+
+    Parameters:
+    - geometry (GeoSeries): The summary feature geometries.
+
+    Returns:
+    - str: Hex digest identifying the summary features in their order.
+    """
+
+    bounds = shapely.bounds(np.asarray(geometry.values))
+    return hashlib.blake2b(bounds.tobytes(), digest_size=20).hexdigest()
+
+
+class ProjectedGeometry:
+    """
+    Geometries in the equal area projection with their areas and a spatial index built on first use.
+
+    Attributes:
+    - geoms (ndarray): The geometries in the equal area projection.
+    - area (ndarray): The area of every geometry.
+    """
+
+    def __init__(self, geoms, area):
+        self.geoms = geoms
+        self.area = area
+        self._tree = None
+
+    def __len__(self):
+        return len(self.geoms)
+
+    @property
+    def tree(self):
+        """STRtree over the geometries, built on first use."""
+        if self._tree is None:
+            self._tree = shapely.STRtree(self.geoms)
+        return self._tree
+
+
+# Function
+def transform_bounds(bounds, crs):
+    """
+    This function converts bounds in the equal area projection to another CRS.
+
+    Parameters:
+    - bounds (tuple): The (minx, miny, maxx, maxy) bounds in the equal area projection.
+    - crs (CRS): The CRS to convert the bounds to, or None if unknown.
+
+    Returns:
+    - tuple: The converted bounds, or None if crs is None.
+    """
+
+    if crs is None:
+        return None
+    return Transformer.from_crs(EQUAL_AREA_CRS, crs, always_xy=True).transform_bounds(*bounds, densify_pts=21)
+
+
+class PreparedTarget:
+    """
+    Shapefile to summarize within, reprojected once and indexed for repeated intersections.
+
+    Attributes:
+    - key (str): The key column name of the shapefile.
+    - crs (CRS): The original CRS of the shapefile, that summary features are first converted to.
+    - shapefile (GeoDataFrame): The shapefile in the equal area projection.
+    - geoms (ndarray): The shapefile geometries in the equal area projection.
+    - codes (ndarray): Position in keys of every shapefile row's key, -1 if the key is missing.
+    - keys (Index): The sorted unique shapefile keys.
+    - tree (STRtree): Spatial index over the shapefile geometries, built on first use.
+    - cache (GeometryCache): Optional cache of reprojected geometries shared with summary features.
+    """
+
+    def __init__(self, input_shapefile, key, cache=None):
+        self.key = key
+        self.crs = input_shapefile.crs
+        self.cache = cache
+
+        # Set equal area projection
+        if cache is not None:
+            projected = cache.project(input_shapefile.geometry)
+            self.shapefile = input_shapefile.copy()
+            self.shapefile[input_shapefile.geometry.name] = gpd.GeoSeries(
+                projected.geoms, crs=EQUAL_AREA_CRS, index=input_shapefile.index)
+            self._projected = projected
+        else:
+            self.shapefile = input_shapefile
+            if input_shapefile.crs != EQUAL_AREA_CRS:
+                self.shapefile = input_shapefile.to_crs(EQUAL_AREA_CRS)
+            self._projected = None
+
+        self.geoms = np.asarray(self.shapefile.geometry.values)
+        self.codes, self.keys = pd.factorize(self.shapefile[key], sort=True)
+        self._tree = None
+
+    @property
+    def tree(self):
+        """STRtree over the shapefile geometries, built on first use and shared through the cache."""
+        if self._projected is not None:
+            return self._projected.tree
+        if self._tree is None:
+            self._tree = shapely.STRtree(self.geoms)
+        return self._tree
+
+    def __len__(self):
+        return len(self.geoms)
+
+    def project(self, input_summary_features):
+        """
+        Reprojects summary features the same way project_equal_area does.
+
+        Parameters:
+        - input_summary_features (GeoDataFrame): The summary features with values to summarize.
+
+        Returns:
+        - GeoDataFrame: The summary features in the equal area projection.
+        """
+
+        # Set same CRS
+        if input_summary_features.crs != self.crs:
+            input_summary_features = input_summary_features.to_crs(self.crs)
+
+        # Set equal area projection
+        if input_summary_features.crs != EQUAL_AREA_CRS:
+            input_summary_features = input_summary_features.to_crs(EQUAL_AREA_CRS)
+        return input_summary_features
+
+    def project_geometry(self, input_summary_features):
+        """
+        Reprojects the geometry of summary features, through the cache if the target has one.
+
+        Parameters:
+        - input_summary_features (GeoDataFrame): The summary features with values to summarize.
+
+        Returns:
+        - ProjectedGeometry: The summary feature geometries in the equal area projection and their areas.
+        """
+
+        if self.cache is not None:
+            return self.cache.project(input_summary_features.geometry, via_crs=self.crs)
+        return project_geometry(input_summary_features.geometry, via_crs=self.crs)
+
+    def filter_bounds(self, input_summary_features):
+        """
+        Keeps the summary features whose bounds overlap the extent of the shapefile.
+
+        Parameters:
+        - input_summary_features (GeoDataFrame): The summary features with values to summarize.
+
+        Returns:
+        - GeoDataFrame: The summary features that can intersect the shapefile.
+        """
+
+        bbox = transform_bounds(self.shapefile.total_bounds, input_summary_features.crs)
+        if bbox is None:
+            return input_summary_features
+        minx, miny, maxx, maxy = input_summary_features.geometry.bounds.to_numpy().T
+        return input_summary_features[(minx <= bbox[2]) & (maxx >= bbox[0]) & (miny <= bbox[3]) & (maxy >= bbox[1])]
+
+
+class Crosswalk:
+    """
+    Sparse source x target overlap weights computed once and reusable for any set of columns.
+
+    Every intersecting (summary feature, shapefile key) pair is stored with its intersect area, and the
+    weight of a pair is the fraction of the summary feature's area that falls inside the key. Pairs are
+    kept sorted by key so that sums and means are sparse matrix products and minimums and maximums are
+    segment reductions.
+
+    Attributes:
+    - key (str): The key column name of the shapefile.
+    - keys (Index): The unique shapefile keys, one per column of the weight matrix.
+    - source_idx (ndarray): Positional row of the summary feature of each pair.
+    - key_idx (ndarray): Position in keys of the shapefile key of each pair.
+    - intersect_area (ndarray): Area of each pair's intersection.
+    - source_area (ndarray): Area of every summary feature.
+    - stats (dict): Number of features and pairs that took each intersection path.
+    - source_fingerprint (str): Fingerprint of the summary features the crosswalk was built from, if known.
+    """
+
+    def __init__(self, key, keys, source_idx, key_idx, intersect_area, source_area, stats=None,
+                 source_fingerprint=None):
+        # Sort pairs by key, then by summary feature
+        order = np.lexsort((source_idx, key_idx))
+
+        self.key = key
+        self.keys = pd.Index(keys)
+        self.source_idx = np.asarray(source_idx, dtype=np.int64)[order]
+        self.key_idx = np.asarray(key_idx, dtype=np.int64)[order]
+        self.intersect_area = np.asarray(intersect_area, dtype=np.float64)[order]
+        self.source_area = np.asarray(source_area, dtype=np.float64)
+        self.stats = stats if stats is not None else {}
+        self.source_fingerprint = source_fingerprint
+        self._verified = None
+
+    def __len__(self):
+        return len(self.source_idx)
+
+    def __repr__(self):
+        return f"Crosswalk(key={self.key!r}, sources={self.n_sources}, keys={len(self.keys)}, pairs={len(self)})"
+
+    @property
+    def n_sources(self):
+        return len(self.source_area)
+
+    @property
+    def overlap_pct(self):
+        """Fraction of each pair's summary feature area that falls inside the key."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.intersect_area / self.source_area[self.source_idx]
+
+    @property
+    def weights(self):
+        """Sparse (sources x keys) matrix of overlap fractions."""
+        return self._matrix(self.overlap_pct)
+
+    def _matrix(self, data):
+        return sparse.csr_matrix((data, (self.source_idx, self.key_idx)), shape=(self.n_sources, len(self.keys)))
+
+    def _weighted_sums(self, data, values):
+        # Sum of the values weighted by data for every key, accumulated in float64 blocks of columns when
+        # the values are downcast, so that only one block at a time is held in float64
+        matrix = self._matrix(data).T
+        if values.dtype == np.float64:
+            return matrix @ values
+        return np.hstack([matrix @ values[:, start:start + 32].astype(np.float64)
+                          for start in range(0, max(values.shape[1], 1), 32)])
+
+    def _verify(self, geometry):
+        # Remember geometries known to match the fingerprint so they are not checked again
+        self._verified = weakref.ref(geometry.values)
+
+    def _check_sources(self, input_summary_features):
+        # Check the summary features line up with the crosswalk
+        if len(input_summary_features) != self.n_sources:
+            raise ValueError(
+                f"input_summary_features has {len(input_summary_features)} rows but the crosswalk "
+                f"was built from {self.n_sources} summary features"
+            )
+
+        # Check summary features with geometries are the same features in the same order
+        if self.source_fingerprint is None or not isinstance(input_summary_features, gpd.GeoDataFrame):
+            return
+        geometry = input_summary_features.geometry
+        if self._verified is not None and self._verified() is geometry.values:
+            return
+        if source_fingerprint(geometry) != self.source_fingerprint:
+            raise ValueError(
+                "input_summary_features are not the summary features the crosswalk was built from, "
+                "or are in a different order"
+            )
+        self._verify(geometry)
+
+    def _values(self, input_summary_features, columns, dtype=None):
+        # Copy only the requested columns into one array, downcast if a dtype is given
+        self._check_sources(input_summary_features)
+        return input_summary_features[columns].to_numpy(dtype=dtype or np.float64)
+
+    def _segments(self):
+        # Start of each run of pairs sharing a key and the keys that have at least one pair
+        starts = np.flatnonzero(np.r_[True, self.key_idx[1:] != self.key_idx[:-1]]) if len(self) else np.array([], dtype=np.int64)
+        return starts, self.key_idx[starts]
+
+    def _result(self, present, values, columns):
+        result = pd.DataFrame({self.key: self.keys.take(present)})
+        if len(columns):
+            result[columns] = values
+        return result
+
+    def sum(self, input_summary_features, columns, dtype=None):
+        """
+        Calculates the weighted sum of the specified columns for every key.
+
+        Parameters:
+        - input_summary_features (DataFrame): Rows in the same order as the summary features the crosswalk was built from.
+        - columns (list): List of column names to calculate the sum for.
+        - dtype (dtype): Optional float dtype, such as np.float32, to calculate in instead of float64.
+
+        Returns:
+        - DataFrame: One row per key with the weighted sum of the specified columns.
+        """
+
+        values = np.nan_to_num(self._values(input_summary_features, columns, dtype))
+        _, present = self._segments()
+        return self._result(present, self._weighted_sums(self.overlap_pct, values)[present].astype(values.dtype), columns)
+
+    def mean(self, input_summary_features, columns, dtype=None):
+        """
+        Calculates the weighted mean of the specified columns for every key.
+
+        Parameters:
+        - input_summary_features (DataFrame): Rows in the same order as the summary features the crosswalk was built from.
+        - columns (list): List of column names to calculate the mean for.
+        - dtype (dtype): Optional float dtype, such as np.float32, to calculate in instead of float64.
+
+        Returns:
+        - DataFrame: One row per key with the weighted mean of the specified columns.
+        """
+
+        values = np.nan_to_num(self._values(input_summary_features, columns, dtype))
+        _, present = self._segments()
+        # Weight each value by its intersect area and overlap percentage
+        weighted_sums = self._weighted_sums(self.intersect_area * self.overlap_pct, values)[present]
+        total_areas = np.bincount(self.key_idx, weights=self.intersect_area, minlength=len(self.keys))[present]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self._result(present, (weighted_sums / total_areas[:, None]).astype(values.dtype), columns)
+
+    def min(self, input_summary_features, columns, dtype=None):
+        """
+        Calculates the weighted minimum of the specified columns for every key.
+
+        Parameters:
+        - input_summary_features (DataFrame): Rows in the same order as the summary features the crosswalk was built from.
+        - columns (list): List of column names to calculate the minimum for.
+        - dtype (dtype): Optional float dtype, such as np.float32, to calculate in instead of float64.
+
+        Returns:
+        - DataFrame: One row per key with the weighted minimum of the specified columns.
+        """
+
+        values = self._values(input_summary_features, columns, dtype)
+        starts, present = self._segments()
+        weighted = values[self.source_idx] * self.overlap_pct.astype(values.dtype)[:, None]
+        return self._result(present, np.fmin.reduceat(weighted, starts, axis=0) if len(self) else weighted, columns)
+
+    def max(self, input_summary_features, columns, dtype=None):
+        """
+        Calculates the maximum of the specified columns for every key.
+
+        Parameters:
+        - input_summary_features (DataFrame): Rows in the same order as the summary features the crosswalk was built from.
+        - columns (list): List of column names to calculate the maximum for.
+        - dtype (dtype): Optional float dtype, such as np.float32, to downcast float columns to.
+
+        Returns:
+        - DataFrame: One row per key with the maximum of the specified columns.
+        """
+
+        self._check_sources(input_summary_features)
+        starts, present = self._segments()
+        # Reduce each column on its own so that integer columns keep their dtype
+        result = self._result(present, None, [])
+        for column in columns:
+            values = input_summary_features[column].to_numpy()[self.source_idx]
+            if dtype is not None and np.issubdtype(values.dtype, np.floating):
+                values = values.astype(dtype)
+            result[column] = np.fmax.reduceat(values, starts) if len(self) else values
+        return result
+
+    def save(self, path):
+        """
+        Saves the crosswalk to a compressed .npz file.
+
+        Parameters:
+        - path (str): Path of the file to write.
+        """
+
+        keys = self.keys.to_numpy()
+        object_keys = keys.dtype == object
+        if object_keys:
+            # Store object keys as text or numbers so that loading never needs pickle
+            inferred = pd.api.types.infer_dtype(keys, skipna=False)
+            if inferred == 'string':
+                keys = keys.astype(str)
+            elif inferred in ('integer', 'floating', 'mixed-integer-float', 'boolean'):
+                keys = np.array(keys.tolist())
+            else:
+                raise TypeError(f"cannot save keys of inferred type {inferred!r}, only strings and numbers")
+
+        extra = {}
+        if self.source_fingerprint is not None:
+            extra['source_fingerprint'] = np.array(self.source_fingerprint)
+        np.savez_compressed(
+            path,
+            key=np.array(self.key),
+            keys=keys,
+            object_keys=np.array(object_keys),
+            source_idx=self.source_idx,
+            key_idx=self.key_idx,
+            intersect_area=self.intersect_area,
+            source_area=self.source_area,
+            **extra,
+        )
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads a crosswalk saved with Crosswalk.save.
+
+        Parameters:
+        - path (str): Path of the file to read.
+
+        Returns:
+        - Crosswalk: The loaded crosswalk.
+        """
+
+        with np.load(path, allow_pickle=False) as data:
+            keys = data["keys"]
+            # Restore object keys as the Python strings or numbers they were saved from
+            if "object_keys" in data.files and data["object_keys"].item():
+                keys = pd.Index(keys.astype(object), dtype=object)
+            return cls(
+                key=data["key"].item(),
+                keys=keys,
+                source_idx=data["source_idx"],
+                key_idx=data["key_idx"],
+                intersect_area=data["intersect_area"],
+                source_area=data["source_area"],
+                source_fingerprint=data["source_fingerprint"].item() if "source_fingerprint" in data.files else None,
+            )
+
+
+# Function
+def build_crosswalk(input_shapefile, input_summary_features, key, engine='overlay', chunk_size=None,
+                    containment=False, tolerance=0.0, n_jobs=None, executor=None, cache=None, profiler=None):
+    """
+    This function computes the overlap between the input_summary_features and the input_shapefile
+    boundaries once and stores it as a reusable sparse crosswalk.
+
+    Parameters:
+    - input_shapefile (GeoDataFrame or PreparedTarget): The shapefile to summarize within.
+    - input_summary_features (GeoDataFrame): The summary features with values to summarize.
+    - key (str): The key column name in input_shapefile to summarize by.
+    - engine (str): Intersection engine to use ('overlay' or 'strtree').
+    - chunk_size (int): Number of pairs to intersect at a time with the 'strtree' engine.
+    - containment (bool): Whether the 'strtree' engine skips the exact intersection of fully nested features.
+    - tolerance (float): Distance in meters a nested feature may extend past its target with containment.
+    - n_jobs (int): Number of processes to intersect spatial tiles in parallel, all CPUs if -1.
+    - executor (Executor): Optional executor to intersect spatial tiles in instead of a new process pool.
+    - cache (GeometryCache): Optional cache of reprojected geometries, areas and spatial indexes.
+    - profiler (Profiler): Optional profiler recording the wall time, rows and memory of every stage.
+
+    Returns:
+    - Crosswalk: Overlap weights between the summary features and the input_shapefile keys.
+    """
+
+    # Set equal area projection
+    if not isinstance(input_shapefile, PreparedTarget):
+        with stage(profiler, 'project_target', rows_in=len(input_shapefile)) as record:
+            input_shapefile = PreparedTarget(input_shapefile, key, cache=cache)
+            record['rows_out'] = len(input_shapefile.geoms)
+    with stage(profiler, 'project_sources', rows_in=len(input_summary_features)) as record:
+        sources = input_shapefile.project_geometry(input_summary_features)
+        record['rows_out'] = len(sources.geoms)
+
+    # Intersect the summary features with the input shapefile
+    stats = {}
+    source_geoms = sources.geoms
+    options = dict(engine=engine, chunk_size=chunk_size, containment=containment, tolerance=tolerance, stats=stats)
+    if executor is not None or n_jobs not in (None, 1):
+        # The stages of the workers are not visible here, so the tiles are timed as a whole
+        with stage(profiler, 'intersect', rows_in=len(source_geoms)) as record:
+            source_idx, target_idx, intersect_area = parallel_pairs(
+                source_geoms, input_shapefile.geoms, n_jobs=n_jobs, executor=executor, **options)
+            record['rows_out'] = len(source_idx)
+            record.update(stats)
+    else:
+        source_idx, target_idx, intersect_area = intersect_pairs(
+            source_geoms, input_shapefile.geoms, tree=input_shapefile.tree if engine == 'strtree' else None,
+            profiler=profiler, **options)
+
+    with stage(profiler, 'crosswalk', rows_in=len(source_idx)) as record:
+        crosswalk = crosswalk_from_pairs(input_shapefile, source_idx, target_idx, intersect_area, sources.area, stats,
+                                         source_fingerprint(input_summary_features.geometry))
+        crosswalk._verify(input_summary_features.geometry)
+        record['rows_out'] = len(crosswalk)
+    return crosswalk
+
+
+# Function
+def crosswalk_from_pairs(target, source_idx, target_idx, intersect_area, source_area, stats=None,
+                         source_fingerprint=None):
+    """
+    This function builds a crosswalk from intersecting pairs of summary features and shapefile rows.
+
+    Parameters:
+    - target (PreparedTarget): The prepared shapefile the pairs were intersected with.
+    - source_idx (ndarray): Positional row of the summary feature of each pair.
+    - target_idx (ndarray): Positional row of the shapefile of each pair.
+    - intersect_area (ndarray): Area of each pair's intersection.
+    - source_area (ndarray): Area of every summary feature.
+    - stats (dict): Number of features and pairs that took each intersection path.
+    - source_fingerprint (str): Optional fingerprint of the summary features the pairs were intersected from.
+
+    Returns:
+    - Crosswalk: Overlap weights between the summary features and the shapefile keys.
+    """
+
+    # Put the pairs in a canonical order so every path reduces them in the same order
+    order = np.lexsort((target_idx, source_idx))
+    source_idx, target_idx, intersect_area = source_idx[order], target_idx[order], intersect_area[order]
+
+    # Map each intersected shapefile row to its key, dropping rows without a key
+    key_idx = target.codes[target_idx]
+    has_key = key_idx >= 0
+
+    return Crosswalk(
+        key=target.key,
+        keys=target.keys,
+        source_idx=source_idx[has_key],
+        key_idx=key_idx[has_key],
+        intersect_area=intersect_area[has_key],
+        source_area=source_area,
+        stats=stats,
+        source_fingerprint=source_fingerprint,
+    )
+
+
+# Function
+def merge_summary(target, grouped_result, join_type, dtypes=None):
+    """
+    This function merges the statistics of every key with the input shapefile and rounds them to 2 decimal places.
+
+    Parameters:
+    - target (PreparedTarget): The prepared shapefile the statistics were calculated within.
+    - grouped_result (DataFrame): The key column and the statistics of every key.
+    - join_type (str): Type of join to perform ('inner', 'left', etc.).
+    - dtypes (Series): Optional dtypes of the summarized columns, to restore integer columns of unweighted maximums.
+
+    Returns:
+    - GeoDataFrame: The input shapefile with the statistics added.
+    """
+
+    columns = [column for column in grouped_result.columns if column != target.key]
+    if dtypes is not None:
+        # Maximums are not weighted, so integer columns keep their dtype
+        grouped_result = grouped_result.copy()
+        for column, dtype in dtypes.items():
+            if pd.api.types.is_integer_dtype(dtype) and grouped_result[column].notna().all():
+                grouped_result[column] = grouped_result[column].astype(dtype)
+
+    # Merge the result with the overlay geodataframe
+    result_gdf = target.shapefile.merge(grouped_result, on=target.key, how=join_type)
+
+    # Round relevant columns to 2 decimal places
+    result_gdf[columns] = result_gdf[columns].round(2)
+
+    return result_gdf
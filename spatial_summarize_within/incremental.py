@@ -0,0 +1,259 @@
+# Import libraries
+import numpy as np
+import pandas as pd
+
+from .crosswalk import STATS, Crosswalk, PreparedTarget, build_crosswalk, merge_summary
+from .intersection import intersect_pairs
+
+
+# Function
+def _segments(ptr, ids):
+    # Positions of the concatenated ptr ranges of ids and the start of each range within them
+    starts = ptr[ids]
+    lengths = ptr[ids + 1] - starts
+    offsets = np.cumsum(lengths) - lengths
+    return np.repeat(starts - offsets, lengths) + np.arange(lengths.sum()), offsets, lengths
+
+
+class IncrementalSummary:
+    """
+    Sum, weighted mean, minimum and maximum of summary features within a shapefile, kept up to date as
+    summary features change without recomputing the overlay.
+
+    Value changes are delta-applied to the sums and weighted means of the keys the changed features
+    overlap, and only those keys' minimums and maximums are recomputed. Geometry changes re-intersect only
+    the changed features with the indexed shapefile. The pairs of changed features are found through
+    indexes by summary feature and by key, so an update takes time proportional to the pairs it changes.
+
+    Attributes:
+    - target (PreparedTarget): The reprojected and indexed shapefile.
+    - crosswalk (Crosswalk): Overlap weights between the summary features and the shapefile keys.
+    - columns (list): The column names summarized.
+    - source_key (str): The column name identifying summary features in updates.
+    """
+
+    def __init__(self, input_shapefile, input_summary_features, columns, key, source_key, crosswalk=None,
+                 engine='overlay', chunk_size=None, containment=False, tolerance=0.0, cache=None):
+        """
+        Parameters:
+        - input_shapefile (GeoDataFrame): The shapefile to summarize within.
+        - input_summary_features (GeoDataFrame): The summary features with values to summarize.
+        - columns (list): List of column names in input_summary_features to summarize.
+        - key (str): The key column name on which to join the shapefiles.
+        - source_key (str): Column name of input_summary_features with a unique id for every feature.
+        - crosswalk (Crosswalk): Optional stored crosswalk of the same features, for example loaded with
+          Crosswalk.load, to skip the overlay.
+        - engine (str): Intersection engine to use ('overlay' or the area-only 'strtree').
+        - chunk_size (int): Number of pairs to intersect at a time with the 'strtree' engine.
+        - containment (bool): Whether the 'strtree' engine skips the exact intersection of nested features.
+        - tolerance (float): Distance in meters a nested summary feature may extend past its polygon with containment.
+        - cache (GeometryCache): Optional cache of reprojected geometries, areas and spatial indexes.
+        """
+
+        self.target = PreparedTarget(input_shapefile, key, cache=cache)
+        self.columns = list(columns)
+        self.source_key = source_key
+        self._options = dict(engine=engine, chunk_size=chunk_size, containment=containment, tolerance=tolerance)
+
+        # Index the summary features by their id
+        self._sources = pd.Index(input_summary_features[source_key])
+        if not self._sources.is_unique:
+            raise ValueError(f"source_key column {source_key!r} must be unique")
+        self._dtypes = input_summary_features[self.columns].dtypes
+        self._values = input_summary_features[self.columns].to_numpy(dtype=np.float64, copy=True)
+
+        # Compute the overlap between the summary features and the input shapefile
+        if crosswalk is None:
+            crosswalk = build_crosswalk(self.target, input_summary_features, key, **self._options)
+        crosswalk._check_sources(input_summary_features)
+        if not crosswalk.keys.equals(self.target.keys):
+            raise ValueError(f"crosswalk was built for other {key!r} keys than those of input_shapefile")
+        self._source_area = crosswalk.source_area.copy()
+        self._index(crosswalk)
+
+        # Calculate every statistic for every key
+        n_keys = len(self.target.keys)
+        self._count = np.zeros(n_keys, dtype=np.int64)
+        self._sum = np.zeros((n_keys, len(self.columns)))
+        self._weighted_sum = np.zeros((n_keys, len(self.columns)))
+        self._area = np.zeros(n_keys)
+        self._min = np.full((n_keys, len(self.columns)), np.nan)
+        self._max = np.full((n_keys, len(self.columns)), np.nan)
+        self._add_pairs(self._indexed_pairs(np.arange(len(crosswalk))), 1)
+        self._reduce_keys(np.flatnonzero(self._count))
+
+    @property
+    def crosswalk(self):
+        """Overlap weights between the summary features and the shapefile keys, with every change applied."""
+        if self._n_retired or len(self._new_pairs[0]):
+            self._compact()
+        return self._crosswalk
+
+    def _index(self, crosswalk):
+        # Index the pairs of a key-sorted crosswalk by key and by summary feature, with no pending changes
+        self._crosswalk = crosswalk
+        self._overlap_pct = crosswalk.overlap_pct
+        self._alive = np.ones(len(crosswalk), dtype=bool)
+        self._n_retired = 0
+        self._key_ptr = np.searchsorted(crosswalk.key_idx, np.arange(len(self.target.keys) + 1))
+        self._source_order = np.argsort(crosswalk.source_idx, kind='stable')
+        self._source_ptr = np.r_[0, np.cumsum(np.bincount(crosswalk.source_idx, minlength=crosswalk.n_sources))]
+        # Pairs of changed geometries added since the crosswalk was indexed, as
+        # (source_idx, key_idx, intersect_area, overlap_pct)
+        self._new_pairs = (np.array([], dtype=np.int64), np.array([], dtype=np.int64), np.array([]), np.array([]))
+
+    def _compact(self):
+        # Rebuild the crosswalk from the live indexed pairs and the pairs added since
+        crosswalk = self._crosswalk
+        source_idx, key_idx, intersect_area, _ = self._gather(
+            np.flatnonzero(self._alive), np.ones(len(self._new_pairs[0]), dtype=bool))
+        self._index(Crosswalk(
+            key=crosswalk.key,
+            keys=crosswalk.keys,
+            source_idx=source_idx,
+            key_idx=key_idx,
+            intersect_area=intersect_area,
+            source_area=self._source_area.copy(),
+            stats=crosswalk.stats,
+        ))
+
+    def _indexed_pairs(self, pairs):
+        # Columns of the given pairs of the indexed crosswalk
+        crosswalk = self._crosswalk
+        return (crosswalk.source_idx[pairs], crosswalk.key_idx[pairs], crosswalk.intersect_area[pairs],
+                self._overlap_pct[pairs])
+
+    def _gather(self, pairs, new):
+        # Columns of the given indexed pairs followed by the selected new pairs
+        return tuple(np.r_[indexed, added[new]] for indexed, added in zip(self._indexed_pairs(pairs), self._new_pairs))
+
+    def _pairs_of(self, rows):
+        # Live indexed pairs and mask of the new pairs of the given summary features
+        positions, _, _ = _segments(self._source_ptr, rows)
+        pairs = self._source_order[positions]
+        return pairs[self._alive[pairs]], np.isin(self._new_pairs[0], rows)
+
+    def _add_pairs(self, pairs, sign):
+        # Add (or subtract with sign=-1) the contribution of pairs to the sums, weighted means and areas
+        source_idx, key_idx, intersect_area, overlap_pct = pairs
+        values = np.nan_to_num(self._values[source_idx])
+        np.add.at(self._sum, key_idx, sign * values * overlap_pct[:, None])
+        np.add.at(self._weighted_sum, key_idx, sign * values * (intersect_area * overlap_pct)[:, None])
+        np.add.at(self._area, key_idx, sign * intersect_area)
+        np.add.at(self._count, key_idx, sign)
+
+    def _reduce_keys(self, keys):
+        # Recompute the minimum and maximum of the given keys from their pairs
+        self._min[keys] = np.nan
+        self._max[keys] = np.nan
+        keys = keys[self._count[keys] > 0]
+        if len(keys) == 0:
+            return
+        pairs, _, _ = _segments(self._key_ptr, keys)
+        source_idx, key_idx, _, overlap_pct = self._gather(pairs[self._alive[pairs]], np.isin(self._new_pairs[1], keys))
+        values = self._values[source_idx]
+        np.fmin.at(self._min, key_idx, values * overlap_pct[:, None])
+        np.fmax.at(self._max, key_idx, values)
+
+    def _rows(self, changes):
+        # Positions of the changed summary features, keeping the last change of each
+        changes = changes.drop_duplicates(subset=self.source_key, keep='last')
+        rows = self._sources.get_indexer(changes[self.source_key])
+        if (rows < 0).any():
+            missing = changes[self.source_key][rows < 0].tolist()
+            raise KeyError(f"unknown {self.source_key} values: {missing[:10]}")
+        return changes, rows
+
+    def _set_values(self, changes, rows):
+        # Store the changed values of the columns present in changes
+        for position, column in enumerate(self.columns):
+            if column in changes.columns:
+                self._values[rows, position] = changes[column].to_numpy(dtype=np.float64)
+
+    def update_values(self, changes):
+        """
+        Applies changed attribute values of summary features.
+
+        Parameters:
+        - changes (DataFrame): Rows with the source_key column and new values for any of the summarized columns.
+        """
+
+        changes, rows = self._rows(changes)
+        pairs = self._gather(*self._pairs_of(rows))
+
+        # Replace the contribution of the changed features and recompute their keys' minimums and maximums
+        self._add_pairs(pairs, -1)
+        self._set_values(changes, rows)
+        self._add_pairs(pairs, 1)
+        self._reduce_keys(np.unique(pairs[1]))
+
+    def update_geometries(self, changes):
+        """
+        Applies changed geometries, and optionally changed values, of summary features.
+
+        Parameters:
+        - changes (GeoDataFrame): Rows with the source_key column, the new geometry and new values for any
+          of the summarized columns.
+        """
+
+        changes, rows = self._rows(changes)
+        old_pairs, old_new = self._pairs_of(rows)
+        old = self._gather(old_pairs, old_new)
+
+        # Remove the contribution of the changed features
+        self._add_pairs(old, -1)
+        self._set_values(changes, rows)
+
+        # Re-intersect only the changed features with the input shapefile
+        sources = self.target.project_geometry(changes)
+        source_idx, target_idx, intersect_area = intersect_pairs(
+            sources.geoms, self.target.geoms, tree=self.target.tree if self._options['engine'] == 'strtree' else None,
+            **self._options)
+        key_idx = self.target.codes[target_idx]
+        has_key = key_idx >= 0
+        self._source_area[rows] = sources.area
+        source_idx = rows[source_idx[has_key]]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            overlap_pct = intersect_area[has_key] / self._source_area[source_idx]
+        new = (source_idx, key_idx[has_key], intersect_area[has_key], overlap_pct)
+
+        # Retire the changed features' pairs and add their new pairs and contribution
+        self._alive[old_pairs] = False
+        self._n_retired += len(old_pairs)
+        self._new_pairs = tuple(np.r_[kept[~old_new], added] for kept, added in zip(self._new_pairs, new))
+        self._add_pairs(new, 1)
+        self._reduce_keys(np.unique(np.r_[old[1], new[1]]))
+
+        # Rebuild the indexes once the pending changes are a sizeable share of the crosswalk
+        if self._n_retired + len(self._new_pairs[0]) > max(len(self._crosswalk) // 32, 1024):
+            self._compact()
+
+    def result(self, stat='sum', join_type='inner'):
+        """
+        Returns the current statistic of the summarized columns within the input_shapefile.
+
+        Parameters:
+        - stat (str): Statistic to return ('sum', 'mean', 'min' or 'max').
+        - join_type (str): Type of join to perform ('inner', 'left', etc.).
+
+        Returns:
+        - GeoDataFrame: GeoDataFrame with the statistic of the summarized columns added, matching
+          sum_within, mean_within, min_within or max_within.
+        """
+
+        if stat not in STATS:
+            raise ValueError(f"stat must be one of {STATS}, got {stat!r}")
+        present = self._count > 0
+        if stat == 'mean':
+            with np.errstate(divide='ignore', invalid='ignore'):
+                values = self._weighted_sum[present] / self._area[present][:, None]
+        else:
+            values = {'sum': self._sum, 'min': self._min, 'max': self._max}[stat][present]
+
+        grouped_result = pd.DataFrame({self.target.key: self.target.keys[present]})
+        grouped_result[self.columns] = values
+
+        # Merge the result with the overlay geodataframe and round it to 2 decimal places
+        result_gdf = merge_summary(self.target, grouped_result, join_type, self._dtypes if stat == 'max' else None)
+
+        return result_gdf
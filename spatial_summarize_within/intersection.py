@@ -0,0 +1,181 @@
+# Import libraries
+import logging
+
+import numpy as np
+import geopandas as gpd
+import shapely
+
+from .profiling import stage
+
+logger = logging.getLogger(__name__)
+
+
+# Function
+def _report(stats, record=None, **counts):
+    # Log the number of features and pairs taking each path and record them in stats and the profiler's stage record
+    logger.info("intersection paths: %s", ", ".join(f"{name}={count}" for name, count in counts.items()))
+    if stats is not None:
+        stats.update(counts)
+    if record is not None:
+        record.update(counts)
+
+
+# Function
+def overlay_pairs(source_geoms, target_geoms, stats=None, profiler=None):
+    """
+    This function intersects the source and target geometries with gpd.overlay and returns the
+    intersecting pairs with their intersect areas.
+
+    Parameters:
+    - source_geoms (array-like): Geometries of the summary features.
+    - target_geoms (array-like): Geometries of the shapefile to summarize within.
+    - stats (dict): Optional dict updated with the number of features and pairs intersected.
+    - profiler (Profiler): Optional profiler recording the 'overlay' and 'area' stages.
+
+    Returns:
+    - tuple: Arrays of (source_idx, target_idx, area) for every intersecting pair.
+    """
+
+    # Keep only the geometry and row position of both inputs
+    sources = gpd.GeoDataFrame({"_source_idx": np.arange(len(source_geoms))}, geometry=np.asarray(source_geoms))
+    targets = gpd.GeoDataFrame({"_target_idx": np.arange(len(target_geoms))}, geometry=np.asarray(target_geoms))
+
+    # Intersect the summary features with the input shapefile
+    with stage(profiler, 'overlay', rows_in=len(sources)) as record:
+        intersected = gpd.overlay(sources, targets, how='intersection', keep_geom_type=False)
+        record['rows_out'] = len(intersected)
+
+    # Calculate the area of each intersection
+    with stage(profiler, 'area', rows_in=len(intersected)) as record:
+        area = intersected.area.to_numpy()
+        record['rows_out'] = len(area)
+        source_idx = intersected["_source_idx"].to_numpy().astype(np.int64)
+        _report(stats, record, sources=len(sources), boundary_sources=len(np.unique(source_idx)),
+                pairs=len(source_idx), intersected_pairs=len(source_idx))
+
+    return source_idx, intersected["_target_idx"].to_numpy().astype(np.int64), area
+
+
+# Function
+def _intersection_areas(source_geoms, target_geoms, source_idx, target_idx, chunk_size=None):
+    # Compute the area of each pair's intersection, chunk by chunk
+    chunk_size = chunk_size or max(len(source_idx), 1)
+    area = np.empty(len(source_idx), dtype=np.float64)
+    for start in range(0, len(source_idx), chunk_size):
+        stop = start + chunk_size
+        area[start:stop] = shapely.area(shapely.intersection(
+            source_geoms[source_idx[start:stop]], target_geoms[target_idx[start:stop]]))
+    return area
+
+
+# Function
+def strtree_pairs(source_geoms, target_geoms, chunk_size=None, containment=False, tolerance=0.0, stats=None,
+                  tree=None, profiler=None):
+    """
+    This function finds the intersecting source and target pairs with a bulk STRtree query and
+    computes their intersect areas without building intersected geometries or attributes.
+
+    With containment, summary features that lie entirely inside a target skip the exact intersection:
+    their pair with that target gets the full feature area and their remaining pairs are only checked
+    for touching boundaries. Only the boundary-straddling features are intersected exactly.
+
+    Parameters:
+    - source_geoms (array-like): Geometries of the summary features.
+    - target_geoms (array-like): Geometries of the shapefile to summarize within.
+    - chunk_size (int): Number of pairs to intersect at a time, all at once if None.
+    - containment (bool): Whether to skip the exact intersection of fully nested summary features.
+    - tolerance (float): Distance a nested summary feature may extend past its target, in CRS units.
+      Features nested in exactly one target within this tolerance get all of their area assigned
+      to it and none to their other targets.
+    - stats (dict): Optional dict updated with the number of features and pairs taking each path.
+    - tree (STRtree): Optional prebuilt STRtree over target_geoms.
+    - profiler (Profiler): Optional profiler recording the 'query', 'containment' and 'area' stages.
+
+    Returns:
+    - tuple: Arrays of (source_idx, target_idx, area) for every intersecting pair.
+    """
+
+    source_geoms = np.asarray(source_geoms)
+    target_geoms = np.asarray(target_geoms)
+
+    # Find candidate pairs whose geometries intersect
+    with stage(profiler, 'query', rows_in=len(source_geoms)) as record:
+        tree = tree if tree is not None else shapely.STRtree(target_geoms)
+        source_idx, target_idx = tree.query(source_geoms, predicate='intersects')
+        record['rows_out'] = len(source_idx)
+
+    if not containment:
+        with stage(profiler, 'area', rows_in=len(source_idx)) as record:
+            area = _intersection_areas(source_geoms, target_geoms, source_idx, target_idx, chunk_size)
+            record['rows_out'] = len(area)
+            _report(stats, record, sources=len(source_geoms), boundary_sources=len(np.unique(source_idx)),
+                    pairs=len(source_idx), intersected_pairs=len(source_idx))
+        return source_idx, target_idx, area
+
+    with stage(profiler, 'containment', rows_in=len(source_idx)) as record:
+        # Classify the pairs whose summary feature is nested in the (buffered) target
+        containers = target_geoms
+        if tolerance > 0:
+            containers = target_geoms.copy()
+            used = np.unique(target_idx)
+            containers[used] = shapely.buffer(target_geoms[used], tolerance)
+        shapely.prepare(containers)
+        nested = shapely.contains(containers[target_idx], source_geoms[source_idx])
+        if tolerance > 0:
+            # A feature within tolerance of several targets is not assigned to any of them
+            nested &= np.bincount(source_idx[nested], minlength=len(source_geoms))[source_idx] == 1
+        nested_source = np.zeros(len(source_geoms), dtype=bool)
+        nested_source[source_idx[nested]] = True
+
+        # Remaining pairs of nested features have no area if they only touch, or are slivers within tolerance
+        skipped = ~nested & nested_source[source_idx]
+        if tolerance == 0:
+            shapely.prepare(target_geoms)
+            skipped[skipped] = shapely.touches(target_geoms[target_idx[skipped]], source_geoms[source_idx[skipped]])
+        intersected = ~nested & ~skipped
+        record['rows_out'] = int(intersected.sum())
+
+    # Assign nested pairs the full feature area and intersect the rest exactly
+    with stage(profiler, 'area', rows_in=len(source_idx)) as record:
+        area = np.zeros(len(source_idx), dtype=np.float64)
+        area[nested] = shapely.area(source_geoms[source_idx[nested]])
+        area[intersected] = _intersection_areas(
+            source_geoms, target_geoms, source_idx[intersected], target_idx[intersected], chunk_size)
+        record['rows_out'] = len(area)
+        _report(stats, record, sources=len(source_geoms), nested_sources=int(nested_source.sum()),
+                boundary_sources=len(np.unique(source_idx[intersected])), pairs=len(source_idx),
+                nested_pairs=int(nested.sum()), skipped_pairs=int(skipped.sum()),
+                intersected_pairs=int(intersected.sum()))
+
+    return source_idx, target_idx, area
+
+
+# Function
+def intersect_pairs(source_geoms, target_geoms, engine='overlay', chunk_size=None, containment=False,
+                    tolerance=0.0, stats=None, tree=None, profiler=None):
+    """
+    This function computes the intersecting source and target pairs with the chosen engine.
+
+    Parameters:
+    - source_geoms (array-like): Geometries of the summary features.
+    - target_geoms (array-like): Geometries of the shapefile to summarize within.
+    - engine (str): Intersection engine to use ('overlay' or 'strtree').
+    - chunk_size (int): Number of pairs to intersect at a time with the 'strtree' engine.
+    - containment (bool): Whether the 'strtree' engine skips the exact intersection of fully nested features.
+    - tolerance (float): Distance a nested feature may extend past its target with containment, in CRS units.
+    - stats (dict): Optional dict updated with the number of features and pairs taking each path.
+    - tree (STRtree): Optional prebuilt STRtree over target_geoms for the 'strtree' engine.
+    - profiler (Profiler): Optional profiler recording the stages of the engine.
+
+    Returns:
+    - tuple: Arrays of (source_idx, target_idx, area) for every intersecting pair.
+    """
+
+    if containment and engine != 'strtree':
+        raise ValueError("containment requires engine='strtree'")
+    if engine == 'overlay':
+        return overlay_pairs(source_geoms, target_geoms, stats=stats, profiler=profiler)
+    if engine == 'strtree':
+        return strtree_pairs(source_geoms, target_geoms, chunk_size=chunk_size, containment=containment,
+                             tolerance=tolerance, stats=stats, tree=tree, profiler=profiler)
+    raise ValueError(f"engine must be 'overlay' or 'strtree', got {engine!r}")
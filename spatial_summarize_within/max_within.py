@@ -1,9 +1,11 @@
 # Import libraries
-import pandas as pd
-import geopandas as gpd
+from .crosswalk import PreparedTarget, build_crosswalk, merge_summary
+from .profiling import stage
 
 # Function
-def max_within(input_shapefile, input_summary_features, columns, key, join_type='inner'):
+def max_within(input_shapefile, input_summary_features, columns, key, join_type='inner', engine='overlay', chunk_size=None,
+               containment=False, tolerance=0.0, n_jobs=None, executor=None, cache=None, profiler=None,
+               dtype=None):
     """
     This function calculates the maximum of the specified columns within the input_shapefile
     boundaries based on the overlapping areas with the input_summary_features, optimized for performance.
@@ -14,43 +16,39 @@ def max_within(input_shapefile, input_summary_features, columns, key, join_type=
     - columns (list): List of column names in input_summary_features to calculate the maximum for.
     - key (str): The key column name on which to join the shapefiles.
     - join_type (str): Type of join to perform ('inner', 'left', etc.).
+    - engine (str): Intersection engine to use ('overlay' or the area-only 'strtree').
+    - chunk_size (int): Number of pairs to intersect at a time with the 'strtree' engine.
+    - containment (bool): Whether the 'strtree' engine skips the exact intersection of summary features
+      nested entirely inside one shapefile polygon.
+    - tolerance (float): Distance in meters a nested summary feature may extend past its polygon with containment.
+    - n_jobs (int): Number of processes to intersect spatial tiles in parallel, all CPUs if -1.
+    - executor (Executor): Optional executor to intersect spatial tiles in instead of a new process pool.
+    - cache (GeometryCache): Optional cache of reprojected geometries, areas and spatial indexes.
+    - profiler (Profiler): Optional profiler recording the wall time, rows and memory of every stage.
+    - dtype (dtype): Optional float dtype, such as np.float32, to downcast float columns to.
 
     Returns:
     - GeoDataFrame: GeoDataFrame with the maximum of specified columns added.
     """
 
-    # Check if key exists in both dataframes and append suffix to key in input_summary_features if key match
-    if key in input_shapefile.columns and key in input_summary_features.columns:
-        input_summary_features = input_summary_features.rename(columns={key: key+"_summary"})
-
-    # Set same CRS
-    if input_summary_features.crs != input_shapefile.crs:
-        input_summary_features = input_summary_features.to_crs(input_shapefile.crs)
-
     # Set equal area projection
-    equal_area_crs = 'EPSG:6933'
-    input_summary_features = input_summary_features.to_crs(equal_area_crs)
-    input_shapefile = input_shapefile.to_crs(equal_area_crs)
-
-    # Add area column to input
-    input_summary_features["area"] = input_summary_features.geometry.area
-    # Intersect the input geodataframe with the entire overlay shapefile
-    intersected = gpd.overlay(input_summary_features, input_shapefile, how='intersection', keep_geom_type=False)
-    # Calculate the area of each polygon in intersect dataframe
-    intersected["intersect_area"] = intersected.area
-    # Calculate the percentage overlap of each polygon
-    intersected["overlap_pct"] = intersected["intersect_area"] / intersected["area"]
-
-    # Group the results by key and calculate maximum
-    grouped_result = intersected.groupby(key)[columns].max().reset_index()
-
-    # Merge the result with the overlay geodataframe
-    result_gdf = input_shapefile.merge(grouped_result, on=key, how=join_type)
-
-    # Round relevant columns to 2 decimal places
-    result_gdf[columns] = result_gdf[columns].round(2)
-
-    # Drop 'intersect_area', 'overlap_pct' columns in intersected if not needed anymore
-    intersected = intersected.drop(['intersect_area', 'overlap_pct'], axis=1)
+    with stage(profiler, 'project_target', rows_in=len(input_shapefile)) as record:
+        target = PreparedTarget(input_shapefile, key, cache=cache)
+        record['rows_out'] = len(target.geoms)
+
+    # Compute the overlap between the summary features and the input shapefile
+    crosswalk = build_crosswalk(target, input_summary_features, key, engine=engine, chunk_size=chunk_size,
+                                containment=containment, tolerance=tolerance, n_jobs=n_jobs, executor=executor,
+                                profiler=profiler)
+
+    # Calculate the maximum for each key
+    with stage(profiler, 'aggregate', rows_in=len(crosswalk)) as record:
+        grouped_result = crosswalk.max(input_summary_features, columns, dtype=dtype)
+        record['rows_out'] = len(grouped_result)
+
+    with stage(profiler, 'merge', rows_in=len(grouped_result)) as record:
+        # Merge the result with the overlay geodataframe and round it to 2 decimal places
+        result_gdf = merge_summary(target, grouped_result, join_type)
+        record['rows_out'] = len(result_gdf)
 
     return result_gdf
@@ -0,0 +1,111 @@
+# Import libraries
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import shapely
+
+from .intersection import _report, intersect_pairs
+
+
+# Function
+def _intersect_tile(source_wkb, source_ids, target_wkb, target_ids, options):
+    # Decode the tile's geometries and intersect them in the worker
+    stats = {}
+    source_idx, target_idx, area = intersect_pairs(
+        shapely.from_wkb(source_wkb), shapely.from_wkb(target_wkb), stats=stats, **options)
+
+    # Map the tile's positions back to rows of the full inputs
+    return source_ids[source_idx], target_ids[target_idx], area, stats
+
+
+# Function
+def spatial_tiles(source_geoms, target_geoms, n_tiles):
+    """
+    This function splits the summary features into a grid of spatial tiles and finds the shapefile
+    polygons each tile needs.
+
+    Every summary feature is assigned to the single tile containing the center of its bounds, so each
+    feature is intersected exactly once and sees all of its candidate polygons in its tile.
+
+    Parameters:
+    - source_geoms (array-like): Geometries of the summary features.
+    - target_geoms (array-like): Geometries of the shapefile to summarize within.
+    - n_tiles (int): Approximate number of tiles in the grid.
+
+    Returns:
+    - list: (source_ids, target_ids) arrays of row positions for every non-empty tile.
+    """
+
+    # Build a grid over the bounds of the summary features
+    bounds = shapely.bounds(source_geoms)
+    centers = (bounds[:, :2] + bounds[:, 2:]) / 2
+    side = max(int(np.ceil(np.sqrt(n_tiles))), 1)
+    low, high = np.nanmin(centers, axis=0), np.nanmax(centers, axis=0)
+    # Empty geometries have no bounds and go to the first tile
+    centers = np.where(np.isnan(centers), low, centers)
+    cell = np.where(high > low, (high - low) / side, 1.0)
+    ij = np.clip(((centers - low) // cell).astype(np.int64), 0, side - 1)
+    tile = ij[:, 0] * side + ij[:, 1]
+
+    # Group the summary features by tile and find the polygons overlapping each tile's extent
+    tree = shapely.STRtree(target_geoms)
+    order = np.argsort(tile, kind='stable')
+    tiles = []
+    for source_ids in np.split(order, np.flatnonzero(np.diff(tile[order])) + 1):
+        extent = shapely.box(*np.nanmin(bounds[source_ids, :2], axis=0), *np.nanmax(bounds[source_ids, 2:], axis=0))
+        tiles.append((source_ids, np.sort(tree.query(extent))))
+    return tiles
+
+
+# Function
+def parallel_pairs(source_geoms, target_geoms, n_jobs=None, executor=None, n_tiles=None, stats=None, **options):
+    """
+    This function computes the intersecting source and target pairs tile by tile across a process pool.
+
+    Geometries are shipped to the workers as WKB and every worker returns the pairs of its tile, so the
+    merged pairs, and every statistic computed from them, are identical to the serial path.
+
+    Parameters:
+    - source_geoms (array-like): Geometries of the summary features.
+    - target_geoms (array-like): Geometries of the shapefile to summarize within.
+    - n_jobs (int): Number of worker processes, all CPUs if -1.
+    - executor (Executor): Optional executor to submit the tiles to instead of a new process pool.
+    - n_tiles (int): Number of spatial tiles, four per worker if None.
+    - stats (dict): Optional dict updated with the number of features and pairs taking each path.
+    - **options: Options passed to intersect_pairs ('engine', 'chunk_size', 'containment', 'tolerance').
+
+    Returns:
+    - tuple: Arrays of (source_idx, target_idx, area) for every intersecting pair.
+    """
+
+    source_geoms = np.asarray(source_geoms)
+    target_geoms = np.asarray(target_geoms)
+    n_jobs = os.cpu_count() if n_jobs in (None, -1) else n_jobs
+    if len(source_geoms) == 0 or len(target_geoms) == 0:
+        return intersect_pairs(source_geoms, target_geoms, stats=stats, **options)
+
+    # Split the summary features into spatial tiles
+    tiles = spatial_tiles(source_geoms, target_geoms, n_tiles or 4 * n_jobs)
+
+    # Intersect every tile in the pool
+    pool = executor or ProcessPoolExecutor(max_workers=n_jobs)
+    try:
+        futures = [
+            pool.submit(_intersect_tile, shapely.to_wkb(source_geoms[source_ids]), source_ids,
+                        shapely.to_wkb(target_geoms[target_ids]), target_ids, options)
+            for source_ids, target_ids in tiles
+        ]
+        results = [future.result() for future in futures]
+    finally:
+        if executor is None:
+            pool.shutdown()
+
+    # Merge the pairs and the path counts of every tile
+    counts = {}
+    for *_, tile_stats in results:
+        for name, count in tile_stats.items():
+            counts[name] = counts.get(name, 0) + count
+    _report(stats, **counts)
+    source_idx, target_idx, area, _ = zip(*results)
+    return np.concatenate(source_idx), np.concatenate(target_idx), np.concatenate(area)
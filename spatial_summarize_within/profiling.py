@@ -0,0 +1,97 @@
+# Import libraries
+import json
+import logging
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+logger = logging.getLogger(__name__)
+
+
+class Profiler:
+    """
+    Records the wall time, rows in and out and optionally the peak memory of every stage of a summary.
+
+    Pass a Profiler to sum_within, mean_within, min_within, max_within or build_crosswalk and read its
+    stages afterwards, or get each stage as it finishes through a callback or structured log records.
+    Peak memory is measured with tracemalloc, which tracks Python and NumPy allocations but not memory
+    allocated inside GEOS, and slows the summary down while it is enabled.
+
+    Attributes:
+    - stages (list): One dict per finished stage with 'stage', 'seconds', 'rows_in', 'rows_out' and,
+      with memory, 'peak_memory' in bytes above the memory in use when the stage started.
+    """
+
+    def __init__(self, callback=None, memory=False, log=False):
+        """
+        Parameters:
+        - callback (callable): Optional function called with the dict of every finished stage.
+        - memory (bool): Whether to measure the peak memory of every stage with tracemalloc.
+        - log (bool): Whether to log every finished stage as a JSON record.
+        """
+
+        self.callback = callback
+        self.memory = memory
+        self.log = log
+        self.stages = []
+
+    def __repr__(self):
+        return f"Profiler(stages={[stage['stage'] for stage in self.stages]})"
+
+    @property
+    def seconds(self):
+        """Total wall time of all recorded stages."""
+        return sum(stage['seconds'] for stage in self.stages)
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        """
+        Times a stage. The yielded dict is the stage's record; set its 'rows_out' inside the block.
+
+        Parameters:
+        - name (str): Name of the stage.
+        - rows_in (int): Number of rows entering the stage.
+        """
+
+        record = {'stage': name, 'rows_in': rows_in, 'rows_out': None}
+        started_tracing = False
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            if self.memory:
+                record['peak_memory'] = tracemalloc.get_traced_memory()[1] - baseline
+                if started_tracing:
+                    tracemalloc.stop()
+            self.stages.append(record)
+            if self.callback is not None:
+                self.callback(record)
+            if self.log:
+                logger.info(json.dumps(record))
+
+
+# Function
+def stage(profiler, name, rows_in=None):
+    """
+    This function times a stage with the profiler, or does nothing if profiler is None.
+
+    Parameters:
+    - profiler (Profiler): The profiler recording the stage, or None.
+    - name (str): Name of the stage.
+    - rows_in (int): Number of rows entering the stage.
+
+    Returns:
+    - context manager: Yields the stage's record dict.
+    """
+
+    if profiler is None:
+        return nullcontext({})
+    return profiler.stage(name, rows_in=rows_in)
@@ -0,0 +1,215 @@
+# Import libraries
+import json
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+from pyproj import CRS
+from scipy import sparse
+
+from .crosswalk import STATS, PreparedTarget, crosswalk_from_pairs, merge_summary, transform_bounds
+from .intersection import intersect_pairs
+
+
+# Function
+def _overlaps(bounds, bbox):
+    # Whether (minx, miny, maxx, maxy) bounds overlap bbox, elementwise for arrays of bounds
+    return (bounds[0] <= bbox[2]) & (bounds[2] >= bbox[0]) & (bounds[1] <= bbox[3]) & (bounds[3] >= bbox[1])
+
+
+# Function
+def _parquet_row_groups(parquet_file, covering, bbox):
+    # Row groups whose bbox covering column statistics overlap bbox, keeping row groups without statistics
+    metadata = parquet_file.metadata
+    paths = {metadata.schema.column(position).path: position for position in range(metadata.num_columns)}
+    positions = [paths.get(".".join(covering[name])) for name in ('xmin', 'ymin', 'xmax', 'ymax')]
+
+    row_groups = []
+    for index in range(metadata.num_row_groups):
+        row_group = metadata.row_group(index)
+        bounds = [-np.inf, -np.inf, np.inf, np.inf]
+        for side, position in enumerate(positions):
+            statistics = row_group.column(position).statistics if position is not None else None
+            if statistics is not None and statistics.has_min_max:
+                bounds[side] = statistics.min if side < 2 else statistics.max
+        if _overlaps(bounds, bbox):
+            row_groups.append(index)
+    return row_groups
+
+
+# Function
+def _read_parquet_batches(path, columns, bounds, batch_size):
+    # Iterate over the row groups of a GeoParquet file that can overlap the bounds, keeping the features inside them
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(path)
+    geo = json.loads(parquet_file.schema_arrow.metadata[b"geo"])
+    geometry = geo["primary_column"]
+    geometry_meta = geo["columns"][geometry]
+    if geometry_meta.get("encoding", "WKB").upper() != "WKB":
+        raise ValueError(f"only WKB encoded GeoParquet is supported, got {geometry_meta['encoding']!r}")
+    crs = geometry_meta.get("crs", "OGC:CRS84")
+    crs = CRS.from_user_input(crs) if crs is not None else None
+    bbox = transform_bounds(bounds, crs)
+
+    # Skip the file, then the row groups, whose bounds do not overlap the shapefile
+    covering = geometry_meta.get("covering", {}).get("bbox")
+    read_columns = list(columns) + [geometry]
+    row_groups = None
+    if bbox is not None:
+        if len(geometry_meta.get("bbox", [])) == 4 and not _overlaps(geometry_meta["bbox"], bbox):
+            return
+        if covering is not None:
+            row_groups = _parquet_row_groups(parquet_file, covering, bbox)
+            read_columns += sorted({covering[name][0] for name in ('xmin', 'ymin', 'xmax', 'ymax')} - set(read_columns))
+    if row_groups == []:
+        return
+
+    for batch in parquet_file.iter_batches(batch_size=batch_size, row_groups=row_groups, columns=read_columns):
+        if bbox is not None and covering is not None:
+            # Keep the features inside the bounds before decoding their geometries
+            feature_bounds = [batch.column(covering[name][0]).field(covering[name][1]).to_numpy(zero_copy_only=False)
+                              for name in ('xmin', 'ymin', 'xmax', 'ymax')]
+            batch = batch.filter(_overlaps(feature_bounds, bbox))
+        geoms = shapely.from_wkb(batch.column(geometry).to_numpy(zero_copy_only=False))
+        frame = gpd.GeoDataFrame(batch.select(list(columns)).to_pandas(), geometry=geoms, crs=crs)
+        if bbox is not None and covering is None:
+            frame = frame[_overlaps(shapely.bounds(geoms).T, bbox)]
+        yield frame
+
+
+# Function
+def _read_ogr_batches(path, columns, bounds, batch_size, layer):
+    # Iterate over Arrow batches of a GDAL/OGR file, letting GDAL filter the features by bounds
+    import pyogrio
+
+    bbox = transform_bounds(bounds, pyogrio.read_info(path, layer=layer)["crs"])
+    with pyogrio.open_arrow(path, layer=layer, columns=list(columns), bbox=bbox, batch_size=batch_size,
+                            use_pyarrow=True) as (meta, reader):
+        geometry = meta["geometry_name"] or "wkb_geometry"
+        for batch in reader:
+            yield gpd.GeoDataFrame(batch.select(list(columns)).to_pandas(),
+                                   geometry=shapely.from_wkb(batch.column(geometry).to_numpy(zero_copy_only=False)),
+                                   crs=meta["crs"])
+
+
+# Function
+def read_batches(path, columns, bounds=None, batch_size=65536, layer=None):
+    """
+    This function reads summary features from disk in batches of at most batch_size features.
+
+    GeoParquet files (.parquet, .geoparquet) are read row group by row group with pyarrow, skipping the
+    row groups outside the bounds when the file has a bbox covering column with statistics. Every other
+    format GDAL can read, such as GeoPackage or shapefile, is read as Arrow batches with pyogrio, which
+    filters the features by bounds in GDAL.
+
+    Parameters:
+    - path (str): Path of the file with the summary features.
+    - columns (list): List of column names to read along with the geometry.
+    - bounds (tuple): Optional (minx, miny, maxx, maxy) in the equal area projection to keep features within.
+    - batch_size (int): Maximum number of features per batch.
+    - layer (str): Layer to read from multi-layer formats like GeoPackage.
+
+    Returns:
+    - generator: GeoDataFrames with the geometry and the requested columns.
+    """
+
+    if str(path).lower().endswith(('.parquet', '.geoparquet')):
+        return _read_parquet_batches(path, columns, bounds, batch_size)
+    return _read_ogr_batches(path, columns, bounds, batch_size, layer)
+
+
+class _Accumulator:
+    # Running per-key aggregates of one statistic over batches of summary features
+
+    def __init__(self, stat, n_keys, n_columns):
+        self.stat = stat
+        self.present = np.zeros(n_keys, dtype=bool)
+        self.values = np.full((n_keys, n_columns), np.nan if stat in ('min', 'max') else 0.0)
+        self.area = np.zeros(n_keys)
+
+    def add(self, crosswalk, values):
+        # Fold one batch's crosswalk into the running aggregates
+        n_keys = len(self.present)
+        self.present[crosswalk.key_idx] = True
+        if self.stat == 'sum':
+            self.values += crosswalk.weights.T @ np.nan_to_num(values)
+        elif self.stat == 'mean':
+            matrix = sparse.csr_matrix((crosswalk.intersect_area * crosswalk.overlap_pct,
+                                        (crosswalk.source_idx, crosswalk.key_idx)), shape=(len(values), n_keys))
+            self.values += matrix.T @ np.nan_to_num(values)
+            self.area += np.bincount(crosswalk.key_idx, weights=crosswalk.intersect_area, minlength=n_keys)
+        elif self.stat == 'min':
+            np.fmin.at(self.values, crosswalk.key_idx, values[crosswalk.source_idx] * crosswalk.overlap_pct[:, None])
+        else:
+            np.fmax.at(self.values, crosswalk.key_idx, values[crosswalk.source_idx])
+
+    def result(self):
+        # Final aggregates of the keys that intersected at least one summary feature
+        values = self.values[self.present]
+        if self.stat == 'mean':
+            with np.errstate(divide='ignore', invalid='ignore'):
+                values = values / self.area[self.present][:, None]
+        return values
+
+
+# Function
+def stream_within(input_shapefile, path, columns, key, stat='sum', join_type='inner', batch_size=65536, layer=None,
+                  engine='strtree', chunk_size=None, containment=False, tolerance=0.0, cache=None):
+    """
+    This function calculates a statistic of the specified columns within the input_shapefile boundaries
+    by streaming the summary features from disk in batches, so memory stays bounded by the batch size.
+
+    The input_shapefile is reprojected and indexed once. Each batch is read with only the requested
+    columns and the features inside the input_shapefile's extent, reprojected, intersected and folded
+    into running per-key aggregates. The result matches sum_within, mean_within, min_within and
+    max_within on the same features.
+
+    Parameters:
+    - input_shapefile (GeoDataFrame): The shapefile to summarize within.
+    - path (str): Path of a GeoParquet, GeoPackage, shapefile or other GDAL file with the summary features.
+    - columns (list): List of column names in the summary features to summarize.
+    - key (str): The key column name on which to join the shapefiles.
+    - stat (str): Statistic to calculate ('sum', 'mean', 'min' or 'max').
+    - join_type (str): Type of join to perform ('inner', 'left', etc.).
+    - batch_size (int): Maximum number of summary features read at a time.
+    - layer (str): Layer to read from multi-layer formats like GeoPackage.
+    - engine (str): Intersection engine to use ('strtree' or 'overlay').
+    - chunk_size (int): Number of pairs to intersect at a time with the 'strtree' engine.
+    - containment (bool): Whether the 'strtree' engine skips the exact intersection of summary features
+      nested entirely inside one shapefile polygon.
+    - tolerance (float): Distance in meters a nested summary feature may extend past its polygon with containment.
+    - cache (GeometryCache): Optional cache of the reprojected input_shapefile and its spatial index.
+
+    Returns:
+    - GeoDataFrame: GeoDataFrame with the statistic of specified columns added.
+    """
+
+    if stat not in STATS:
+        raise ValueError(f"stat must be one of {STATS}, got {stat!r}")
+
+    # Set equal area projection and index the input shapefile once
+    target = PreparedTarget(input_shapefile, key, cache=cache)
+    accumulator = _Accumulator(stat, len(target.keys), len(columns))
+
+    # Intersect every batch with the input shapefile and fold it into the running aggregates
+    dtypes = None
+    for batch in read_batches(path, columns, target.shapefile.total_bounds, batch_size=batch_size, layer=layer):
+        dtypes = batch[columns].dtypes if dtypes is None else dtypes
+        batch = target.project(batch)
+        source_geoms = batch.geometry.values
+        source_idx, target_idx, intersect_area = intersect_pairs(
+            source_geoms, target.geoms, engine=engine, chunk_size=chunk_size, containment=containment,
+            tolerance=tolerance, tree=target.tree if engine == 'strtree' else None)
+        crosswalk = crosswalk_from_pairs(target, source_idx, target_idx, intersect_area, source_geoms.area)
+        accumulator.add(crosswalk, batch[columns].to_numpy(dtype=np.float64))
+
+    # Build the grouped result of the keys that intersected the summary features
+    grouped_result = pd.DataFrame({key: target.keys[accumulator.present]})
+    grouped_result[columns] = accumulator.result()
+
+    # Merge the result with the overlay geodataframe and round it to 2 decimal places
+    result_gdf = merge_summary(target, grouped_result, join_type, dtypes if stat == 'max' else None)
+
+    return result_gdf
@@ -0,0 +1,95 @@
+# Import libraries
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import shapely
+
+from .crosswalk import STATS, PreparedTarget, build_crosswalk, merge_summary
+
+
+# Function
+def _summarize(target, input_summary_features, columns, stats, options, dtype):
+    # Keep the features that can intersect the shapefile and calculate every statistic from one crosswalk
+    input_summary_features = target.filter_bounds(input_summary_features)
+    crosswalk = build_crosswalk(target, input_summary_features, target.key, **options)
+    return {stat: getattr(crosswalk, stat)(input_summary_features, columns, dtype=dtype).set_index(target.key) for stat in stats}
+
+
+# Function
+def summarize_many(input_shapefile, input_summary_features, columns, key, stats='sum', join_type='inner', wide=True,
+                   n_jobs=None, engine='strtree', chunk_size=None, containment=False, tolerance=0.0, cache=None,
+                   dtype=None):
+    """
+    This function summarizes many summary feature datasets within the same input_shapefile boundaries,
+    reprojecting and indexing the input_shapefile only once.
+
+    Each dataset is first filtered to the features whose bounds overlap the extent of the input_shapefile,
+    so that state-level files only touch the polygons they overlap. Result columns are named after the
+    dataset and the column, with the statistic appended when several statistics are requested.
+
+    Parameters:
+    - input_shapefile (GeoDataFrame): The shapefile to summarize within.
+    - input_summary_features (dict): Summary feature GeoDataFrames to summarize, by dataset name.
+    - columns (list or dict): List of column names to summarize, or lists of column names by dataset name.
+    - key (str): The key column name on which to join the shapefiles.
+    - stats (str or list): Statistic or list of statistics to calculate ('sum', 'mean', 'min', 'max').
+    - join_type (str): Type of join to perform ('inner', 'left', etc.).
+    - wide (bool): Whether to return one GeoDataFrame with the columns of every dataset or a dict of them.
+    - n_jobs (int): Number of datasets to summarize concurrently in threads.
+    - engine (str): Intersection engine to use ('strtree', which reuses the shapefile's spatial index, or 'overlay').
+    - chunk_size (int): Number of pairs to intersect at a time with the 'strtree' engine.
+    - containment (bool): Whether the 'strtree' engine skips the exact intersection of summary features
+      nested entirely inside one shapefile polygon.
+    - tolerance (float): Distance in meters a nested summary feature may extend past its polygon with containment.
+    - cache (GeometryCache): Optional cache of reprojected geometries, areas and spatial indexes.
+    - dtype (dtype): Optional float dtype, such as np.float32, to calculate in instead of float64.
+
+    Returns:
+    - GeoDataFrame or dict: GeoDataFrame with the statistics of every dataset added, or a dict of
+      GeoDataFrames with the statistics of each dataset by dataset name.
+    """
+
+    stats = [stats] if isinstance(stats, str) else list(stats)
+    for stat in stats:
+        if stat not in STATS:
+            raise ValueError(f"stats must be in {STATS}, got {stat!r}")
+    if not isinstance(columns, dict):
+        columns = {name: columns for name in input_summary_features}
+
+    # Set equal area projection and index the input shapefile once
+    target = PreparedTarget(input_shapefile, key, cache=cache)
+    options = dict(engine=engine, chunk_size=chunk_size, containment=containment, tolerance=tolerance)
+    if engine == 'strtree':
+        # Build the spatial index and prepare the shapefile geometries before threads share them
+        target.tree
+        if containment:
+            shapely.prepare(target.geoms)
+
+    # Summarize every dataset against the shared input shapefile
+    with ThreadPoolExecutor(max_workers=n_jobs or 1) as executor:
+        futures = {
+            name: executor.submit(_summarize, target, features, columns[name], stats, options, dtype)
+            for name, features in input_summary_features.items()
+        }
+        results = {name: future.result() for name, future in futures.items()}
+
+    # Name the columns of every dataset's statistics
+    grouped_results = {}
+    for name, by_stat in results.items():
+        renamed = [
+            grouped.rename(columns=lambda column: column if len(stats) == 1 else f"{column}_{stat}")
+            for stat, grouped in by_stat.items()
+        ]
+        grouped_results[name] = pd.concat(renamed, axis=1)
+
+    if not wide:
+        # Merge each dataset's result with the overlay geodataframe
+        return {
+            name: merge_summary(target, grouped_result.reset_index(), join_type)
+            for name, grouped_result in grouped_results.items()
+        }
+
+    # Merge the results of every dataset with the overlay geodataframe
+    grouped_result = pd.concat(
+        [grouped.add_prefix(f"{name}_") for name, grouped in grouped_results.items()], axis=1)
+    return merge_summary(target, grouped_result.reset_index(), join_type)
@@ -0,0 +1,49 @@
+# Import libraries
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Generate the synthetic data of the benchmarks
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmarks"))
+
+from synthetic import make_data
+
+KEY = 'DISTRICT'
+COLUMNS = ['value_0', 'value_1', 'value_2']
+
+
+@pytest.fixture(scope='module')
+def data(request):
+    """
+    Synthetic (targets, sources) with integer and float columns and missing values. Parametrize indirectly
+    with the number of sources, 1,000 by default.
+    """
+
+    targets, sources = make_data(getattr(request, 'param', 1_000), n_columns=len(COLUMNS))
+    sources['value_1'] = sources['value_1'].astype(float)
+    sources.loc[[3, 500], 'value_1'] = np.nan
+    return targets, sources
+
+
+# Function
+def assert_same_summary(expected, result, columns=None, atol=0.011, check_dtype=True):
+    """
+    Asserts two summaries have the same rows and values, up to the rounding to 2 decimal places.
+
+    Parameters:
+    - expected (DataFrame): The expected summary.
+    - result (DataFrame): The summary to check.
+    - columns (list): Optional columns to compare, every column but the geometry by default.
+    - atol (float): Absolute tolerance of the values.
+    - check_dtype (bool): Whether the columns must also have the same dtypes.
+    """
+
+    if columns is None:
+        expected, result = expected.drop(columns='geometry'), result.drop(columns='geometry')
+    else:
+        expected, result = expected[columns], result[columns]
+    pd.testing.assert_frame_equal(pd.DataFrame(expected), pd.DataFrame(result), check_dtype=check_dtype,
+                                  atol=atol)
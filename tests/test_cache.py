@@ -0,0 +1,87 @@
+# Import libraries
+import os
+
+import geopandas as gpd
+import numpy as np
+import pytest
+import shapely
+
+from conftest import COLUMNS, KEY, assert_same_summary
+import spatial_summarize_within as sw
+from spatial_summarize_within.cache import fingerprint
+
+
+@pytest.mark.parametrize('engine', ['overlay', 'strtree'])
+def test_cached_results_match_uncached(data, engine):
+    targets, sources = data
+    cache = sw.GeometryCache()
+    for stat in sw.crosswalk.STATS:
+        expected = getattr(sw, f"{stat}_within")(targets, sources, COLUMNS, KEY, engine=engine)
+        for _ in range(2):
+            result = getattr(sw, f"{stat}_within")(targets, sources, COLUMNS, KEY, engine=engine, cache=cache)
+            assert_same_summary(expected, result, atol=0)
+            assert result.geometry.geom_equals_exact(expected.geometry, 0).all()
+
+
+def test_counters(data):
+    targets, sources = data
+    cache = sw.GeometryCache()
+    sw.sum_within(targets, sources, COLUMNS, KEY, cache=cache)
+    assert (cache.hits, cache.disk_hits, cache.misses) == (0, 0, 2)
+    sw.mean_within(targets, sources, COLUMNS, KEY, cache=cache)
+    assert (cache.hits, cache.disk_hits, cache.misses) == (2, 0, 2)
+
+    cache.clear()
+    assert len(cache) == 0 and (cache.hits, cache.disk_hits, cache.misses) == (0, 0, 0)
+
+
+def test_evicts_least_recently_used(data):
+    _, sources = data
+    first, second, third = (sources.geometry.iloc[start:start + 10] for start in (0, 10, 20))
+    cache = sw.GeometryCache(maxsize=2)
+    cache.project(first)
+    cache.project(second)
+    cache.project(first)
+    cache.project(third)
+    assert len(cache) == 2 and (cache.hits, cache.misses) == (1, 3)
+
+    # The second geometries were least recently used and are projected again
+    cache.project(first)
+    cache.project(second)
+    assert (cache.hits, cache.misses) == (2, 4)
+
+
+def test_reloads_from_disk(data, tmp_path):
+    _, sources = data
+    entry = sw.GeometryCache(directory=tmp_path).project(sources.geometry)
+
+    cache = sw.GeometryCache(directory=tmp_path)
+    loaded = cache.project(sources.geometry)
+    assert (cache.hits, cache.disk_hits, cache.misses) == (0, 1, 0)
+    assert isinstance(loaded.area, np.memmap)
+    np.testing.assert_array_equal(entry.area, loaded.area)
+    assert shapely.equals_exact(entry.geoms, loaded.geoms, 0).all()
+
+
+def test_concurrent_save_keeps_the_first_entry(data, tmp_path):
+    _, sources = data
+    cache = sw.GeometryCache(directory=tmp_path)
+    entry = cache.project(sources.geometry)
+    key = fingerprint(sources.geometry)
+
+    # Another process writing the same entry finds it in place and removes its own copy
+    cache._save(key, entry)
+    assert os.listdir(tmp_path) == [key]
+    assert sorted(os.listdir(tmp_path / key)) == ['area.npy', 'offsets.npy', 'wkb.npy']
+
+
+def test_skips_reprojection_of_equal_area_geometries(data, monkeypatch):
+    _, sources = data
+    projected = sources.geometry.to_crs(sw.crosswalk.EQUAL_AREA_CRS)
+
+    def to_crs(*args, **kwargs):
+        raise AssertionError("geometries already in the equal area projection were reprojected")
+
+    monkeypatch.setattr(gpd.GeoSeries, 'to_crs', to_crs)
+    entry = sw.GeometryCache().project(projected)
+    np.testing.assert_array_equal(entry.area, projected.area.to_numpy())
@@ -0,0 +1,142 @@
+# Import libraries
+from concurrent.futures import ProcessPoolExecutor
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import COLUMNS, KEY, assert_same_summary
+import spatial_summarize_within as sw
+from spatial_summarize_within.crosswalk import project_equal_area
+from spatial_summarize_within.intersection import intersect_pairs
+
+# Intersection options that must all match the overlay
+OPTIONS = {
+    'overlay': {'engine': 'overlay'},
+    'strtree': {'engine': 'strtree'},
+    'containment': {'engine': 'strtree', 'containment': True},
+    'parallel': {'engine': 'strtree', 'containment': True, 'n_jobs': 2},
+}
+
+
+# Function
+def original_within(stat, input_shapefile, input_summary_features, columns, key, join_type='inner'):
+    # The original overlay implementation of sum_within, mean_within, min_within and max_within
+    input_summary_features = input_summary_features.to_crs('EPSG:6933')
+    input_shapefile = input_shapefile.to_crs('EPSG:6933')
+    input_summary_features["area"] = input_summary_features.geometry.area
+    intersected = gpd.overlay(input_summary_features, input_shapefile, how='intersection', keep_geom_type=False)
+    intersected["intersect_area"] = intersected.area
+    intersected["overlap_pct"] = intersected["intersect_area"] / intersected["area"]
+    grouped = intersected.groupby(key)
+    if stat == 'sum':
+        grouped_result = intersected[columns].mul(intersected["overlap_pct"], axis=0).groupby(intersected[key]).sum()
+    elif stat == 'mean':
+        weighted = intersected[columns].mul(intersected["intersect_area"] * intersected["overlap_pct"], axis=0)
+        grouped_result = weighted.groupby(intersected[key]).sum().div(grouped["intersect_area"].sum(), axis=0)
+    elif stat == 'min':
+        grouped_result = intersected[columns].mul(intersected["overlap_pct"], axis=0).groupby(intersected[key]).min()
+    else:
+        grouped_result = grouped[columns].max()
+    result_gdf = input_shapefile.merge(grouped_result.reset_index(), on=key, how=join_type)
+    result_gdf[columns] = result_gdf[columns].round(2)
+    return result_gdf
+
+
+@pytest.mark.parametrize('name', ['strtree', 'containment'])
+def test_engines_return_the_same_pairs_and_areas(data, name):
+    targets, sources = data
+    sources, targets = project_equal_area(sources, targets)
+    source_geoms, target_geoms = sources.geometry.values, targets.geometry.values
+
+    expected = intersect_pairs(source_geoms, target_geoms, **OPTIONS['overlay'])
+    result = intersect_pairs(source_geoms, target_geoms, **OPTIONS[name])
+
+    expected_order = np.lexsort((expected[1], expected[0]))
+    result_order = np.lexsort((result[1], result[0]))
+    np.testing.assert_array_equal(expected[0][expected_order], result[0][result_order])
+    np.testing.assert_array_equal(expected[1][expected_order], result[1][result_order])
+    np.testing.assert_allclose(expected[2][expected_order], result[2][result_order], rtol=1e-9, atol=1e-6)
+
+
+@pytest.mark.parametrize('name', list(OPTIONS))
+@pytest.mark.parametrize('stat', sw.crosswalk.STATS)
+def test_within_matches_the_original_overlay(data, stat, name):
+    targets, sources = data
+    for join_type in ['inner', 'left']:
+        expected = original_within(stat, targets, sources, COLUMNS, KEY, join_type=join_type)
+        result = getattr(sw, f"{stat}_within")(targets, sources, COLUMNS, KEY, join_type=join_type, **OPTIONS[name])
+
+        assert_same_summary(expected, result)
+        assert result.crs == expected.crs
+        assert result.geometry.geom_equals(expected.geometry).all()
+
+
+@pytest.mark.parametrize('engine', ['overlay', 'strtree'])
+def test_parallel_is_identical_to_serial(data, engine):
+    targets, sources = data
+    serial = sw.build_crosswalk(targets, sources, KEY, engine=engine)
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        parallel = sw.build_crosswalk(targets, sources, KEY, engine=engine, executor=executor)
+        for stat in sw.crosswalk.STATS:
+            pd.testing.assert_frame_equal(
+                getattr(sw, f"{stat}_within")(targets, sources, COLUMNS, KEY, engine=engine),
+                getattr(sw, f"{stat}_within")(targets, sources, COLUMNS, KEY, engine=engine, executor=executor))
+
+    for attribute in ['source_idx', 'key_idx', 'intersect_area', 'source_area']:
+        np.testing.assert_array_equal(getattr(serial, attribute), getattr(parallel, attribute))
+    assert serial.stats == parallel.stats
+
+
+@pytest.mark.parametrize('keys', [
+    lambda n: pd.Series([f"D{position}" for position in range(n)], dtype=object),
+    lambda n: pd.Series(list(range(n)), dtype=object),
+    lambda n: pd.Series(np.arange(n) * 10),
+], ids=['object-str', 'object-int', 'int'])
+def test_crosswalk_save_load_round_trip(data, tmp_path, keys):
+    targets, sources = data
+    targets = targets.assign(**{KEY: keys(len(targets))})
+    crosswalk = sw.build_crosswalk(targets, sources, KEY, engine='strtree')
+    crosswalk.save(tmp_path / "crosswalk.npz")
+    loaded = sw.Crosswalk.load(tmp_path / "crosswalk.npz")
+
+    assert list(loaded.keys) == list(crosswalk.keys)
+    for stat in sw.crosswalk.STATS:
+        expected = getattr(crosswalk, stat)(sources, COLUMNS)
+        result = getattr(loaded, stat)(sources, COLUMNS)
+        pd.testing.assert_frame_equal(expected, result, check_index_type=False)
+        assert len(targets.merge(result, on=KEY)) == len(expected)
+
+
+def test_crosswalk_rejects_reordered_summary_features(data, tmp_path):
+    targets, sources = data
+    crosswalk = sw.build_crosswalk(targets, sources, KEY, engine='strtree')
+    crosswalk.save(tmp_path / "crosswalk.npz")
+    loaded = sw.Crosswalk.load(tmp_path / "crosswalk.npz")
+
+    reordered = sources.iloc[::-1].reset_index(drop=True)
+    with pytest.raises(ValueError):
+        loaded.sum(reordered, COLUMNS)
+    with pytest.raises(ValueError):
+        crosswalk.sum(sources.iloc[1:], COLUMNS)
+
+
+def test_crosswalk_rejects_unsupported_object_keys(data, tmp_path):
+    targets, sources = data
+    targets = targets.assign(**{KEY: pd.Series([(position,) for position in range(len(targets))], dtype=object)})
+    crosswalk = sw.build_crosswalk(targets, sources, KEY, engine='strtree')
+    with pytest.raises(TypeError):
+        crosswalk.save(tmp_path / "crosswalk.npz")
+
+
+@pytest.mark.parametrize('stat', sw.crosswalk.STATS)
+def test_float32_matches_float64(data, stat):
+    targets, sources = data
+    expected = getattr(sw, f"{stat}_within")(targets, sources, COLUMNS, KEY, engine='strtree')
+    result = getattr(sw, f"{stat}_within")(targets, sources, COLUMNS, KEY, engine='strtree', dtype=np.float32)
+
+    assert_same_summary(expected, result, check_dtype=False)
+    for column in COLUMNS:
+        integer_max = stat == 'max' and pd.api.types.is_integer_dtype(sources[column])
+        assert result[column].dtype == (sources[column].dtype if integer_max else np.float32)
@@ -0,0 +1,55 @@
+# Import libraries
+import numpy as np
+import pandas as pd
+import pytest
+import shapely
+
+from conftest import COLUMNS, KEY, assert_same_summary
+import spatial_summarize_within as sw
+
+
+# Function
+def assert_matches(summary, targets, sources):
+    # Every statistic of the summary must match a fresh summary of the updated features
+    for stat in sw.crosswalk.STATS:
+        expected = getattr(sw, f"{stat}_within")(targets, sources, COLUMNS, KEY, engine='strtree')
+        assert_same_summary(expected, summary.result(stat), check_dtype=False)
+
+
+def test_update_values(data):
+    targets, sources = data
+    summary = sw.IncrementalSummary(targets, sources, COLUMNS, KEY, 'SOURCE_ID', engine='strtree')
+
+    changes = sources.iloc[[5, 700, 701, 1500]][['SOURCE_ID']].assign(value_0=[0, 5000, -3, 12])
+    summary.update_values(changes)
+    sources = sources.copy()
+    sources.loc[changes.index, 'value_0'] = changes['value_0']
+    assert_matches(summary, targets, sources)
+
+
+def test_update_geometries(data):
+    targets, sources = data
+    summary = sw.IncrementalSummary(targets, sources, COLUMNS, KEY, 'SOURCE_ID', engine='strtree')
+    sources = sources.copy()
+
+    # Move features over and over again, past the number of pending changes that rebuilds the crosswalk
+    rng = np.random.default_rng(1)
+    for _ in range(4):
+        rows = rng.choice(len(sources), size=150, replace=False)
+        changes = sources.iloc[rows][['SOURCE_ID', 'geometry']].copy()
+        offset = rng.uniform(-0.05, 0.05, 2)
+        changes['geometry'] = shapely.transform(changes.geometry.values, lambda coords: coords + offset)
+        changes['value_1'] = rng.integers(0, 1000, len(rows))
+        summary.update_geometries(changes)
+        sources.loc[changes.index, ['geometry', 'value_1']] = changes[['geometry', 'value_1']]
+        assert_matches(summary, targets, sources)
+
+    crosswalk = sw.build_crosswalk(targets, sources, KEY, engine='strtree')
+    pd.testing.assert_frame_equal(crosswalk.sum(sources, COLUMNS), summary.crosswalk.sum(sources, COLUMNS))
+
+
+def test_rejects_a_crosswalk_of_other_keys(data):
+    targets, sources = data
+    crosswalk = sw.build_crosswalk(targets.assign(**{KEY: targets[KEY] + "_other"}), sources, KEY, engine='strtree')
+    with pytest.raises(ValueError):
+        sw.IncrementalSummary(targets, sources, COLUMNS, KEY, 'SOURCE_ID', crosswalk=crosswalk)
@@ -0,0 +1,65 @@
+# Import libraries
+import json
+import tracemalloc
+
+import pytest
+
+from conftest import COLUMNS, KEY
+import spatial_summarize_within as sw
+from spatial_summarize_within.profiling import stage
+
+# Number of features and pairs taking each intersection path
+PATHS = ['sources', 'nested_sources', 'boundary_sources', 'pairs', 'nested_pairs', 'skipped_pairs',
+         'intersected_pairs']
+
+
+@pytest.mark.parametrize('n_jobs', [None, 2])
+def test_stage_records_carry_the_intersection_paths(data, n_jobs):
+    targets, sources = data
+    profiler = sw.Profiler()
+    sw.sum_within(targets, sources, COLUMNS, KEY, engine='strtree', containment=True, n_jobs=n_jobs, profiler=profiler)
+    crosswalk = sw.build_crosswalk(targets, sources, KEY, engine='strtree', containment=True)
+
+    record = next(record for record in profiler.stages if record['stage'] == ('intersect' if n_jobs else 'area'))
+    assert {path: record[path] for path in PATHS} == crosswalk.stats
+    assert 0 < record['nested_sources'] < record['sources'] == len(sources)
+
+
+@pytest.mark.parametrize('options, stages', [
+    ({'engine': 'overlay'}, ['overlay', 'area']),
+    ({'engine': 'strtree'}, ['query', 'area']),
+    ({'engine': 'strtree', 'containment': True}, ['query', 'containment', 'area']),
+    ({'engine': 'strtree', 'n_jobs': 2}, ['intersect']),
+], ids=['overlay', 'strtree', 'containment', 'parallel'])
+def test_records_every_stage(data, options, stages):
+    targets, sources = data
+    received = []
+    profiler = sw.Profiler(callback=received.append)
+    result = sw.mean_within(targets, sources, COLUMNS, KEY, profiler=profiler, **options)
+
+    names = ['project_target', 'project_sources'] + stages + ['crosswalk', 'aggregate', 'merge']
+    assert [record['stage'] for record in profiler.stages] == names
+    assert received == profiler.stages
+    assert profiler.seconds == pytest.approx(sum(record['seconds'] for record in profiler.stages))
+
+    records = {record['stage']: record for record in profiler.stages}
+    assert records['project_sources']['rows_in'] == records['project_sources']['rows_out'] == len(sources)
+    assert records['crosswalk']['rows_out'] == records['aggregate']['rows_in']
+    assert records['merge']['rows_out'] == len(result)
+    assert all('peak_memory' not in record for record in profiler.stages)
+
+
+def test_measures_memory_and_logs_json_records(data, caplog):
+    targets, sources = data
+    profiler = sw.Profiler(memory=True, log=True)
+    with caplog.at_level('INFO', logger='spatial_summarize_within.profiling'):
+        sw.sum_within(targets, sources, COLUMNS, KEY, engine='strtree', profiler=profiler)
+
+    assert all(record['peak_memory'] > 0 for record in profiler.stages)
+    assert [json.loads(message) for message in caplog.messages] == profiler.stages
+    assert not tracemalloc.is_tracing()
+
+
+def test_stage_without_a_profiler_does_nothing():
+    with stage(None, 'merge', rows_in=10) as record:
+        record['rows_out'] = 10
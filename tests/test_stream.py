@@ -0,0 +1,56 @@
+# Import libraries
+import pytest
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+from conftest import COLUMNS, KEY, assert_same_summary
+import spatial_summarize_within as sw
+from spatial_summarize_within.crosswalk import PreparedTarget, transform_bounds
+from spatial_summarize_within.stream_within import _parquet_row_groups
+
+pytestmark = pytest.mark.parametrize('data', [2_000], indirect=True)
+
+
+@pytest.fixture
+def west(data):
+    # Summarize within the western half so that the eastern row groups can be skipped
+    targets, sources = data
+    minx = targets.geometry.bounds['minx']
+    return targets[minx < minx.median()], sources
+
+
+@pytest.mark.parametrize('covering', [True, False], ids=['covering', 'no-covering'])
+def test_stream_parquet_matches_within(west, tmp_path, covering):
+    targets, sources = west
+    path = tmp_path / "sources.parquet"
+    sources.iloc[sources.geometry.bounds['minx'].argsort()].to_parquet(
+        path, write_covering_bbox=covering, row_group_size=200)
+
+    for stat in sw.crosswalk.STATS:
+        expected = getattr(sw, f"{stat}_within")(targets, sources, COLUMNS, KEY, engine='strtree')
+        result = sw.stream_within(targets, path, COLUMNS, KEY, stat=stat, batch_size=150)
+        assert_same_summary(expected, result, check_dtype=False)
+
+
+def test_stream_parquet_skips_row_groups_outside_the_shapefile(west, tmp_path):
+    targets, sources = west
+    path = tmp_path / "sources.parquet"
+    sources.iloc[sources.geometry.bounds['minx'].argsort()].to_parquet(
+        path, write_covering_bbox=True, row_group_size=200)
+
+    parquet_file = pq.ParquetFile(path)
+    bbox = transform_bounds(PreparedTarget(targets, KEY).shapefile.total_bounds, sources.crs)
+    row_groups = _parquet_row_groups(parquet_file, {'xmin': ['bbox', 'xmin'], 'ymin': ['bbox', 'ymin'],
+                                                    'xmax': ['bbox', 'xmax'], 'ymax': ['bbox', 'ymax']}, bbox)
+    assert 0 < len(row_groups) < parquet_file.metadata.num_row_groups
+
+
+def test_stream_geopackage_matches_within(west, tmp_path):
+    pytest.importorskip("pyogrio")
+    targets, sources = west
+    path = tmp_path / "sources.gpkg"
+    sources.to_file(path, engine='pyogrio')
+
+    expected = sw.sum_within(targets, sources, COLUMNS, KEY, engine='strtree')
+    result = sw.stream_within(targets, path, COLUMNS, KEY, batch_size=150)
+    assert_same_summary(expected, result, check_dtype=False)
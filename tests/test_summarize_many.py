@@ -0,0 +1,63 @@
+# Import libraries
+import numpy as np
+import pandas as pd
+import pytest
+import shapely
+
+from conftest import COLUMNS, KEY, assert_same_summary
+import spatial_summarize_within as sw
+
+
+@pytest.fixture(scope='module')
+def datasets(data):
+    # A second dataset with other values and features far outside the shapefile
+    _, sources = data
+    far = sources.iloc[:50].copy()
+    far['geometry'] = shapely.transform(far.geometry.values, lambda coords: coords + [40, 0])
+    doubled = sources.assign(**{column: sources[column] * 2 for column in COLUMNS})
+    return {'first': sources, 'second': pd.concat([doubled, far], ignore_index=True)}
+
+
+# Function
+def dataset_columns(result, name, columns, suffix=""):
+    # The columns of one dataset renamed back to the summarized columns
+    return result.rename(columns={f"{name}_{column}{suffix}": column for column in columns})
+
+
+@pytest.mark.parametrize('engine', ['overlay', 'strtree'])
+def test_wide_matches_within(data, datasets, engine):
+    targets, _ = data
+    result = sw.summarize_many(targets, datasets, COLUMNS, KEY, stats=['sum', 'max'], join_type='left',
+                               engine=engine, n_jobs=2)
+
+    for name, features in datasets.items():
+        for stat in ['sum', 'max']:
+            expected = getattr(sw, f"{stat}_within")(targets, features, COLUMNS, KEY, join_type='left', engine=engine)
+            assert_same_summary(expected, dataset_columns(result, name, COLUMNS, f"_{stat}"),
+                                columns=[KEY] + COLUMNS, check_dtype=False)
+
+
+def test_dict_matches_within(data, datasets):
+    targets, _ = data
+    columns = {'first': COLUMNS[:1], 'second': COLUMNS[1:]}
+    results = sw.summarize_many(targets, datasets, columns, KEY, stats='mean', wide=False)
+
+    assert set(results) == set(datasets)
+    for name, features in datasets.items():
+        expected = sw.mean_within(targets, features, columns[name], KEY)
+        assert list(results[name].columns) == list(targets.columns) + columns[name]
+        assert_same_summary(expected, results[name])
+
+
+def test_filter_bounds_drops_features_outside_the_shapefile(data, datasets):
+    targets, sources = data
+    target = sw.PreparedTarget(targets, KEY)
+    assert len(target.filter_bounds(datasets['second'])) == len(sources)
+    assert len(target.filter_bounds(sources)) == len(sources)
+
+
+def test_float32_matches_float64(data, datasets):
+    targets, _ = data
+    expected = sw.summarize_many(targets, datasets, COLUMNS, KEY, stats=['sum', 'mean'])
+    result = sw.summarize_many(targets, datasets, COLUMNS, KEY, stats=['sum', 'mean'], dtype=np.float32)
+    assert_same_summary(expected, result, check_dtype=False)